@@ -1,6 +1,6 @@
 
 import streamlit as st
-from visualize_game import run_game_streamlit
+from visualize_game import run_game_streamlit, run_sweep_streamlit, load_trace_streamlit, replay_trace_streamlit
 
 def main():
     st.title("Wumpus Game Dashboard")
@@ -11,21 +11,56 @@ def main():
     board_scale = st.sidebar.slider("Tamanho do Tabuleiro (4x4, 5x5, 6x6...)", 4, 20, 4)
     max_steps_agent = st.sidebar.slider("Máximo de Passos do Agente", 10, 400, 10)
 
-    simulation_mode = st.sidebar.selectbox("Modo de Simulação", ["Única", "Múltiplas"])
+    simulation_mode = st.sidebar.selectbox("Modo de Simulação", ["Única", "Múltiplas", "Varredura"])
     num_of_simulations = 1
     
     if simulation_mode == "Múltiplas":
         num_of_simulations = st.sidebar.slider("Número de Simulações", 2, 100, 2)
 
+    # Varredura: grade tamanho × buracos (os dois primeiros sliders não valem)
+    if simulation_mode == "Varredura":
+        size_range = st.sidebar.slider("Tamanhos do tabuleiro", 4, 20, (4, 12))
+        size_step = st.sidebar.slider("Passo do tamanho", 1, 8, 2)
+        pit_range = st.sidebar.slider("Números de buracos", 1, 40, (1, 15))
+        pit_step = st.sidebar.slider("Passo dos buracos", 1, 10, 2)
+        num_of_simulations = st.sidebar.slider("Jogos por ponto", 2, 200, 20)
+
+    # Desenho da simulação única: o jogo é calculado antes e os quadros
+    # saem do trace (pular passos, limitar o fps ou ir direto ao fim)
+    frame_skip, fps, jump_to_end = 1, 20, False
+    if simulation_mode == "Única":
+        frame_skip = st.sidebar.slider("Passos por quadro", 1, 20, 1)
+        fps = st.sidebar.slider("Quadros por segundo", 1, 60, 20)
+        jump_to_end = st.sidebar.checkbox("Pular para o fim")
+
+    # Seed fixa repete os mesmos mundos (0 = mundos novos a cada execução)
+    seed = st.sidebar.number_input("Seed (0 = aleatória)", min_value=0, value=0, step=1)
+
+    # Mede o tempo de cada fase do agente (inferência, planejamento...)
+    profile = st.sidebar.checkbox("Medir tempo por fase")
+
+    # Agente com o posterior exato dos buracos (em vez do risco 0.2/0.9)
+    exact_pits = st.sidebar.checkbox("Probabilidade exata dos buracos")
+
     if "run" not in st.session_state:
         st.session_state.run = False
 
     if st.sidebar.button("Iniciar Jogo"):
         st.session_state.run = True
 
-    if st.session_state.run:
-        run_game_streamlit(size=board_scale, n_pits=game_level, max_steps=max_steps_agent, num_simulations=num_of_simulations)
+    if st.session_state.run and simulation_mode == "Varredura":
+        run_sweep_streamlit(range(size_range[0], size_range[1] + 1, size_step),
+                            range(pit_range[0], pit_range[1] + 1, pit_step),
+                            max_steps_agent, num_of_simulations, seed=int(seed) or None, exact_pits=exact_pits)
+        st.session_state.run = False
+    elif st.session_state.run:
+        run_game_streamlit(size=board_scale, n_pits=game_level, max_steps=max_steps_agent, num_simulations=num_of_simulations, seed=int(seed) or None, profile=profile, exact_pits=exact_pits, frame_skip=frame_skip, fps=fps, jump_to_end=jump_to_end)
         st.session_state.run = False
 
+    # Replay do último jogo desta sessão (ou de um trace salvo pela API)
+    trace = load_trace_streamlit()
+    if trace is not None:
+        replay_trace_streamlit(trace)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
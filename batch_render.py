@@ -0,0 +1,257 @@
+import argparse
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+import matplotlib
+matplotlib.use("Agg")  # visualize_game importa o pyplot; aqui nada abre janela
+
+import numpy as np
+from PIL import Image, GifImagePlugin
+
+from game_trace import GameTrace, TraceReplay
+from visualize_game import BoardRenderer, play_single_game
+from wumpus_environment import sprite_atlas
+
+
+# Renderizador em lote: exporta jogos (por seed ou traces .npz gravados) para
+# GIF ou MP4 sem abrir o Streamlit. Cada jogo roda num processo do pool e os
+# quadros vão direto para o codificador, um de cada vez: a memória não cresce
+# com o número de passos.
+#
+#   python batch_render.py --seeds 1 2 3 --size 12 --pits 10
+#   python batch_render.py --traces traces/seed7_*/*.npz --format mp4
+SCALE = 4        # cada pixel do sprite vira SCALE x SCALE pixels
+FPS = 8
+END_HOLD = 1.0   # segundos parados no último quadro
+OUTPUT_DIR = "renders"
+
+
+@lru_cache(maxsize=1)
+def atlas_palette():
+    # Todas as cores do atlas de sprites (o tabuleiro só usa essas), em
+    # ordem de código RGB: o quadro vira índices de paleta por busca binária,
+    # sem quantização
+    atlas = sprite_atlas()
+    colors = [atlas['floor'].reshape(-1, 3)]
+    for name, sprite in atlas.items():
+        if name != 'floor':
+            colors.append((sprite[..., :3][sprite[..., 3] > 0] * 255).astype(np.uint8))
+    colors = np.unique(np.concatenate(colors), axis=0)
+    # O GIF tem 256 índices e o GifWriter reserva um para a transparência
+    if len(colors) > 255:
+        raise ValueError(f"o atlas tem {len(colors)} cores; o GIF aceita no máximo 255 (+ transparência)")
+    return rgb_codes(colors), colors
+
+
+def rgb_codes(pixels):
+    pixels = pixels.astype(np.uint32)
+    return (pixels[..., 0] << 16) | (pixels[..., 1] << 8) | pixels[..., 2]
+
+
+def upscale(frame, scale):
+    if scale == 1:
+        return frame
+    return frame.repeat(scale, axis=0).repeat(scale, axis=1)
+
+
+class GifWriter:
+    # GIF escrito quadro a quadro com a paleta fixa do atlas. Cada quadro
+    # guarda só o retângulo que mudou desde o anterior, com os pixels iguais
+    # ao quadro anterior transparentes (comprimem quase a zero); quadros
+    # iguais viram um só, com a duração somada. Só o quadro anterior fica
+    # na memória.
+    def __init__(self, path, fps=FPS):
+        self.file = open(path, "wb")
+        self.frame_ms = 1000 / fps
+        self.codes, colors = atlas_palette()
+        self.transparent = len(colors)  # índice extra, depois das cores do atlas
+        self.palette = colors.reshape(-1).tolist() + [0, 0, 0]
+        self.previous = None
+        self.pending = None  # (imagem, deslocamento, duração em ms) ainda não escrita
+
+    def indices(self, frame):
+        return np.searchsorted(self.codes, rgb_codes(frame)).astype(np.uint8)
+
+    def write(self, frame, repeat=1):
+        indices = self.indices(frame)
+        duration = self.frame_ms * repeat
+        if self.previous is None:
+            image = self.image(indices)
+            header, _ = GifImagePlugin.getheader(image, info={"loop": 0})
+            self.file.write(b"".join(header))
+            self.pending = (image, (0, 0), duration)
+        else:
+            changed = indices != self.previous
+            rows = np.flatnonzero(changed.any(axis=1))
+            if len(rows) == 0:
+                image, offset, before = self.pending
+                self.pending = (image, offset, before + duration)
+                return
+            self.flush()
+            cols = np.flatnonzero(changed.any(axis=0))
+            top, bottom = rows[0], rows[-1] + 1
+            left, right = cols[0], cols[-1] + 1
+            patch = np.where(changed[top:bottom, left:right], indices[top:bottom, left:right], self.transparent)
+            self.pending = (self.image(patch.astype(np.uint8)), (int(left), int(top)), duration)
+        self.previous = indices
+
+    def image(self, indices):
+        image = Image.fromarray(indices)
+        image.putpalette(self.palette)  # L → P com a paleta do atlas
+        return image
+
+    def flush(self):
+        image, offset, duration = self.pending
+        # disposal=1: o quadro fica na tela e o próximo retângulo é pintado por cima
+        for chunk in GifImagePlugin.getdata(image, offset, duration=round(duration), disposal=1,
+                                            transparency=self.transparent):
+            self.file.write(chunk)
+        self.pending = None
+
+    def close(self):
+        if self.pending is not None:
+            self.flush()
+        self.file.write(b";")
+        self.file.close()
+
+
+class Mp4Writer:
+    # Manda os quadros RGB crus para o ffmpeg pela entrada padrão; o ffmpeg
+    # codifica em H.264 enquanto o jogo ainda está sendo desenhado
+    def __init__(self, path, fps=FPS):
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            raise RuntimeError("MP4 precisa do ffmpeg no PATH (ou use --format gif)")
+        self.path = path
+        self.fps = fps
+        self.ffmpeg = ffmpeg
+        self.process = None
+
+    def write(self, frame, repeat=1):
+        if self.process is None:
+            height, width = frame.shape[:2]
+            self.process = subprocess.Popen(
+                [self.ffmpeg, "-y", "-loglevel", "error",
+                 "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(self.fps), "-i", "-",
+                 "-c:v", "libx264", "-pix_fmt", "yuv420p", self.path],
+                stdin=subprocess.PIPE,
+            )
+        data = np.ascontiguousarray(frame).tobytes()
+        for _ in range(repeat):
+            self.process.stdin.write(data)
+
+    def close(self):
+        if self.process is None:
+            return
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg falhou ao gerar {self.path}")
+
+
+WRITERS = {"gif": GifWriter, "mp4": Mp4Writer}
+
+
+def game_frames(trace, frame_skip=1):
+    # Quadros do tabuleiro (uint8, (size*8, size*8, 3)) nos passos 0, k, 2k...
+    # e sempre no último. O array devolvido é reaproveitado pelo
+    # BoardRenderer no quadro seguinte: use-o antes de pedir o próximo.
+    replay = TraceReplay(trace)
+    renderer = BoardRenderer()
+    steps = list(range(0, trace.num_steps + 1, max(1, frame_skip)))
+    if steps[-1] != trace.num_steps:
+        steps.append(trace.num_steps)
+    for t in steps:
+        yield renderer.render(replay.seek(t))
+
+
+def load_game(source, size, n_pits, max_steps):
+    # source: ("seed", n) joga de novo o jogo da seed; ("trace", caminho) abre o .npz
+    kind, value = source
+    if kind == "trace":
+        return GameTrace.load(value)
+    _, _, trace, _, _, _ = play_single_game(size, n_pits, max_steps, seed=value, belief_every=0)
+    return trace
+
+
+def output_name(source, size, n_pits, fmt):
+    kind, value = source
+    if kind == "trace":
+        return os.path.splitext(os.path.basename(value))[0] + "." + fmt
+    return f"seed{value}_{size}x{size}_{n_pits}pits.{fmt}"
+
+
+def render_game(source, output, size=8, n_pits=3, max_steps=200, fmt="gif", scale=SCALE, fps=FPS, frame_skip=1):
+    # Um jogo → um arquivo. Roda no pool; devolve um resumo pequeno.
+    start = time.perf_counter()
+    trace = load_game(source, size, n_pits, max_steps)
+    writer = WRITERS[fmt](output, fps)
+    frames = 0
+    try:
+        for frame in game_frames(trace, frame_skip):
+            frame = upscale(frame, scale)
+            writer.write(frame)
+            frames += 1
+        # O último quadro fica parado por END_HOLD segundos
+        hold = round(END_HOLD * fps) - 1
+        if hold > 0:
+            writer.write(frame, repeat=hold)
+    finally:
+        writer.close()
+    return {
+        "output": output,
+        "steps": trace.num_steps,
+        "outcome": trace.outcome,
+        "frames": frames,
+        "bytes": os.path.getsize(output),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def render_batch(sources, output_dir=OUTPUT_DIR, workers=None, size=8, n_pits=3, max_steps=200, fmt="gif",
+                 scale=SCALE, fps=FPS, frame_skip=1):
+    # Espalha os jogos pelo pool de processos; os resumos saem na ordem em
+    # que os jogos terminam
+    os.makedirs(output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(render_game, source, os.path.join(output_dir, output_name(source, size, n_pits, fmt)),
+                            size, n_pits, max_steps, fmt, scale, fps, frame_skip)
+            for source in sources
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta jogos do Wumpus para GIF/MP4 em paralelo")
+    parser.add_argument("--seeds", type=int, nargs="*", default=[], help="seeds de jogos novos")
+    parser.add_argument("--traces", nargs="*", default=[], help="traces .npz gravados (game_trace.py)")
+    parser.add_argument("--size", type=int, default=8, help="tamanho do tabuleiro (jogos por seed)")
+    parser.add_argument("--pits", type=int, default=3, help="número de buracos (jogos por seed)")
+    parser.add_argument("--max-steps", type=int, default=200, help="limite de passos (jogos por seed)")
+    parser.add_argument("--format", choices=list(WRITERS), default="gif")
+    parser.add_argument("--scale", type=int, default=SCALE, help="pixels por pixel de sprite")
+    parser.add_argument("--fps", type=float, default=FPS)
+    parser.add_argument("--frame-skip", type=int, default=1, help="desenha um passo a cada N")
+    parser.add_argument("--workers", type=int, default=None, help="processos (padrão: número de CPUs)")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    args = parser.parse_args()
+
+    sources = [("seed", seed) for seed in args.seeds] + [("trace", path) for path in args.traces]
+    if not sources:
+        parser.error("informe --seeds e/ou --traces")
+    if args.format == "mp4" and shutil.which("ffmpeg") is None:
+        parser.error("MP4 precisa do ffmpeg no PATH (ou use --format gif)")
+
+    for done in render_batch(sources, args.output_dir, args.workers, args.size, args.pits, args.max_steps,
+                             args.format, args.scale, args.fps, args.frame_skip):
+        print(f"{done['output']}: {done['steps']} passos ({done['outcome']}), {done['frames']} quadros, "
+              f"{done['bytes'] / 1024:.1f} KB em {done['seconds']:.2f} s", flush=True)
+
+
+if __name__ == "__main__":
+    main()
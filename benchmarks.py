@@ -0,0 +1,205 @@
+import argparse
+import json
+import platform
+import subprocess
+import time
+
+import matplotlib
+matplotlib.use("Agg")  # mede o desenho sem abrir janela
+
+import numpy as np
+
+from besyan_agent import BayesianAgent, IncrementalPlanner
+from wumpus_environment import WumpusEnvironment, ACTIONS, game_seed
+from visualize_game import BoardRenderer, LiveView
+from simulations_api import run_multiple_simulations_api, run_batched_simulations_api
+
+
+# Benchmarks dos caminhos quentes do agente, do ambiente e da visualização
+# em vários tamanhos de tabuleiro e densidades de buracos. O resultado vai
+# para um JSON (--output) e dois JSONs de commits diferentes podem ser
+# comparados com --compare antigo.json novo.json.
+SIZES = (4, 8, 16, 32, 64, 128, 200)
+DENSITIES = {"sparse": 0.05, "medium": 0.15, "dense": 0.3}  # fração das células com buraco
+
+# Jogos completos por tamanho no teste de ponta a ponta (tabuleiros grandes
+# são lentos demais para muitos jogos)
+E2E_GAMES = {4: 200, 8: 100, 16: 40, 32: 10, 64: 3, 128: 1, 200: 1}
+
+
+def pits_for(size, density):
+    return max(1, min(size * size - 3, round(density * (size * size - 1))))
+
+
+def time_call(fn, setup=None, min_time=0.2, max_calls=2000):
+    # Chama fn até somar min_time segundos (no mínimo 3 vezes); setup roda
+    # antes de cada chamada e fica fora da medida
+    times = []
+    while len(times) < max_calls and (sum(times) < min_time or len(times) < 3):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times = np.array(times)
+    return {
+        "calls": len(times),
+        "mean_s": float(times.mean()),
+        "median_s": float(np.median(times)),
+        "min_s": float(times.min()),
+    }
+
+
+def warm_game(size, n_pits, seed, warmup):
+    # Ambiente e agente no meio de um jogo (até `warmup` passos do próprio
+    # agente), para que as crenças e a fronteira tenham um tamanho realista
+    env = WumpusEnvironment(size, n_pits, seed=game_seed(seed, 0))
+    agent = BayesianAgent(size)
+    obs = env.get_observation()
+    agent.update(obs, env.agent_pos)
+    for _ in range(warmup):
+        action = agent.choose_action(env.agent_pos, env.gold_pos)
+        if action is None:
+            break
+        obs, done, _ = env.step(action)
+        if done:
+            break
+        agent.update(obs, env.agent_pos)
+    return env, agent, obs
+
+
+def bench_board(size, n_pits, seed=0, min_time=0.2):
+    env, agent, obs = warm_game(size, n_pits, seed, warmup=2 * size)
+    pos = env.agent_pos
+    target = agent.find_best_target(pos)
+    risk = agent.P_wumpus + agent.P_pit
+    rng = np.random.default_rng(seed)
+    results = {}
+
+    def run(name, fn, setup=None):
+        results[name] = time_call(fn, setup, min_time)
+
+    run("agent.predict", agent.predict)
+    run("agent.update", lambda: agent.update(obs, pos))
+    run("agent.infer_pits", agent.infer_pits)
+    run("agent.find_best_target", lambda: agent.find_best_target(pos))
+    if target is not None:
+        run("agent.a_star", lambda: agent.a_star(pos, target, 0.3))
+        run("planner.plan", lambda: agent.planner.plan(risk, pos, target))
+        # D* Lite opcional: busca nova e replanejamento sem mudanças
+        dstar = IncrementalPlanner(size)
+        run("dstar.plan", lambda: dstar.plan(risk, pos, target), setup=dstar.reset)
+        run("dstar.replan", lambda: dstar.plan(risk, pos, target))
+
+    # Ambiente: outro jogo, para não mexer no estado usado acima
+    game = WumpusEnvironment(size, n_pits, seed=game_seed(seed, 1))
+    run("env.reset", game.reset)
+    run("env.step", lambda: game.step(ACTIONS[rng.integers(4)]),
+        setup=lambda: game.reset() if game.game_over else None)
+
+    renderer = BoardRenderer()
+    renderer.render(env)
+    run("render.board", lambda: renderer.render(env))
+    view = LiveView(env, agent)
+
+    def draw():
+        view.update(env, agent, 0)
+        view.fig.canvas.draw()
+    run("render.live_view", draw)
+    view.close()
+    return results
+
+
+def bench_end_to_end(size, n_pits, games, seed=0):
+    # Jogos completos por segundo, no modo serial e no vetorizado
+    results = {}
+    for name, runner in (("e2e.serial", run_multiple_simulations_api), ("e2e.vectorized", run_batched_simulations_api)):
+        start = time.perf_counter()
+        totals = runner(size, n_pits, 4 * size, games, seed=seed)
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            "games": games,
+            "seconds": elapsed,
+            "games_per_s": games / elapsed,
+            "steps_per_s": totals["total_steps"] / elapsed,
+        }
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes=SIZES, densities=tuple(DENSITIES), min_time=0.2, end_to_end=True, seed=0):
+    rows = []
+    for size in sizes:
+        for density in densities:
+            n_pits = pits_for(size, DENSITIES[density])
+            found = bench_board(size, n_pits, seed, min_time)
+            if end_to_end:
+                found.update(bench_end_to_end(size, n_pits, E2E_GAMES.get(size, 1), seed))
+            for bench, stats in found.items():
+                rows.append({"bench": bench, "size": size, "density": density, "n_pits": n_pits, **stats})
+                print(f"{bench:24s} {size:4d} {density:7s} " + describe(rows[-1]), flush=True)
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": rows,
+    }
+
+
+def describe(row):
+    if "games_per_s" in row:
+        return f"{row['games_per_s']:10.2f} jogos/s"
+    return f"{row['median_s'] * 1e3:10.4f} ms (mediana de {row['calls']})"
+
+
+def compare(old_path, new_path):
+    # Razão novo/antigo da mediana (ou de jogos/s, invertida): < 1 é mais rápido
+    with open(old_path) as f:
+        old = {(r["bench"], r["size"], r["density"]): r for r in json.load(f)["results"]}
+    with open(new_path) as f:
+        new = json.load(f)["results"]
+    for row in new:
+        before = old.get((row["bench"], row["size"], row["density"]))
+        if before is None:
+            continue
+        if "games_per_s" in row:
+            ratio = before["games_per_s"] / row["games_per_s"]
+        else:
+            ratio = row["median_s"] / before["median_s"]
+        print(f"{row['bench']:24s} {row['size']:4d} {row['density']:7s} {ratio:6.2f}x tempo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do agente, do ambiente e da visualização")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="tamanhos de tabuleiro")
+    parser.add_argument("--densities", nargs="+", default=list(DENSITIES), choices=list(DENSITIES),
+                        help="densidades de buracos")
+    parser.add_argument("--min-time", type=float, default=0.2, help="segundos medidos por benchmark")
+    parser.add_argument("--no-e2e", action="store_true", help="pula os jogos completos")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmarks.json", help="arquivo JSON de saída")
+    parser.add_argument("--compare", nargs=2, metavar=("ANTIGO", "NOVO"), help="compara dois JSONs e sai")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run_suite(args.sizes, args.densities, args.min_time, not args.no_e2e, args.seed)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"{len(report['results'])} medidas salvas em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
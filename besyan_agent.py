@@ -1,126 +1,686 @@
 import heapq
+from collections import defaultdict
+from functools import lru_cache
+from time import perf_counter
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from wumpus_environment import (
+    ACTIONS, BOARD_CACHE_SIZE, BREEZE_SHIFT, GLITTER_BIT, NO_ACTION, STENCH_BIT, STENCH_RADIUS,
+    count_adjacent, distance_kernel, encode_percepts, kernel_window, radius_kernel, unpack_percepts,
+)
+
+
+# --- MODELO DE MOVIMENTO DO WUMPUS ---
+@lru_cache(maxsize=BOARD_CACHE_SIZE)
+def motion_operator(size):
+    # Número de vizinhos de cada célula (2 nos cantos, 3 nas bordas, 4 no meio).
+    # Só depende do tamanho, então é calculado uma vez e reaproveitado.
+    degree = np.full((size, size), 4.0)
+    degree[0, :] -= 1
+    degree[-1, :] -= 1
+    degree[:, 0] -= 1
+    degree[:, -1] -= 1
+    degree.flags.writeable = False
+    return degree
+
+
+def predict_wumpus(P, degree):
+    # Funciona tanto para um tabuleiro (size, size) quanto para um lote
+    # (N, size, size): os deslocamentos são sempre nos dois últimos eixos.
+    size = P.shape[-1]
+    if size == 1:
+        # Célula isolada: o Wumpus não tem para onde ir
+        return P.copy()
+
+    stay = 0.5 * P
+    share = stay / degree
+
+    # A ordem das somas reproduz a do laço original (varredura linha a linha):
+    # vem de cima, da esquerda, fica, vem da direita, vem de baixo.
+    # Assim o resultado é idêntico bit a bit ao cálculo célula a célula.
+    new_P = np.zeros_like(P)
+    new_P[..., 1:, :] += share[..., :-1, :]
+    new_P[..., :, 1:] += share[..., :, :-1]
+    new_P += stay
+    new_P[..., :, :-1] += share[..., :, 1:]
+    new_P[..., :-1, :] += share[..., 1:, :]
+    return new_P
+
+
+# --- MÁSCARAS DE DISTÂNCIA (BRILHO / FEDOR) ---
+# Os kernels em cache ficam em wumpus_environment (o ambiente usa o mesmo
+# diamante para o fedor); aqui só os recortes usados pelo agente.
+def radius_mask(size, pos, radius):
+    # Células com abs(x-ax) + abs(y-ay) <= radius
+    return kernel_window(radius_kernel(size, radius), size, pos)
+
+
+def distance_field(size, pos):
+    # abs(x-ax) + abs(y-ay) para todas as células
+    return kernel_window(distance_kernel(size), size, pos)
+
+
+def window_stack(kernel, size, positions):
+    # Versão em lote de radius_mask: recorta a janela de cada posição (N, 2)
+    # e devolve um array (N, size, size)
+    windows = sliding_window_view(kernel, (size, size))
+    return windows[size - 1 - positions[:, 0], size - 1 - positions[:, 1]]
+
+
+@lru_cache(maxsize=BOARD_CACHE_SIZE)
+def neighbor_table(size):
+    # Vizinhos (N, S, L, O) de cada célula, montados uma vez por tamanho:
+    # neighbor_table(size)[pos] é uma tupla de posições
+    table = {}
+    for x in range(size):
+        for y in range(size):
+            neighbors = []
+            if x > 0: neighbors.append((x-1, y))
+            if x < size-1: neighbors.append((x+1, y))
+            if y > 0: neighbors.append((x, y-1))
+            if y < size-1: neighbors.append((x, y+1))
+            table[(x, y)] = tuple(neighbors)
+    return table
+
+
+def masked_argmin(risk, dist, candidates):
+    # Para cada tabuleiro do lote, a célula candidata com menor
+    # (risco, distância, posição) — a mesma ordem de frontier.sort().
+    # Devolve (N, 2) com -1 onde não há candidata.
+    n, size = risk.shape[0], risk.shape[-1]
+    candidates = candidates.reshape(n, -1)
+    flat_risk = np.where(candidates, risk.reshape(n, -1), np.inf)
+    ties = candidates & (flat_risk == flat_risk.min(axis=1, keepdims=True))
+    flat_dist = np.where(ties, dist.reshape(n, -1), np.iinfo(np.int64).max)
+    # argmin devolve a primeira ocorrência: menor (x, y) entre os empates
+    best = flat_dist.argmin(axis=1)
+    targets = np.stack(np.divmod(best, size), axis=1)
+    targets[~candidates.any(axis=1)] = -1
+    return targets
+
+
+# --- POSTERIOR EXATO DOS BURACOS NA FRONTEIRA ---
+# As brisas ligam as células desconhecidas vizinhas em componentes
+# independentes: duas células só influenciam uma à outra se estiverem
+# ligadas por uma cadeia de brisas. Cada componente pequena é resolvida
+# exatamente (todas as atribuições consistentes com as contagens); as
+# grandes demais ficam com o risco heurístico (0.2/0.9).
+PIT_PRIOR = 0.15        # chance a priori de buraco numa célula desconhecida
+EXACT_PIT_CELLS = 16    # maior componente (em células) resolvida exatamente
+PIT_CACHE_SIZE = 4096   # componentes resolvidas guardadas (entre passos e jogos)
+
+
+@lru_cache(maxsize=PIT_CACHE_SIZE)
+def component_posterior(constraints, prior):
+    # constraints: ((células, buracos que faltam), ...) em coordenadas locais.
+    # Enumera as atribuições buraco/sem buraco que satisfazem todas as
+    # restrições, cada uma com peso prior^k (1-prior)^(m-k), e devolve
+    # ((célula, P(buraco)), ...) ou None se nenhuma for consistente.
+    cells = sorted({cell for group, _ in constraints for cell in group})
+    index = {cell: i for i, cell in enumerate(cells)}
+    m = len(cells)
+    watch = [[] for _ in range(m)]   # restrições de cada célula
+    need = []                        # buracos que ainda faltam em cada restrição
+    left = []                        # células ainda sem valor em cada restrição
+    for j, (group, n) in enumerate(constraints):
+        need.append(n)
+        left.append(len(group))
+        for cell in group:
+            watch[index[cell]].append(j)
+
+    # Pesos relativos: (1-prior)^m é comum a todas e se cancela
+    odds = prior / (1 - prior)
+    assignment = [False] * m
+    marginal = [0.0] * m
+    total = 0.0
+
+    def search(i, weight):
+        nonlocal total
+        if i == m:
+            total += weight
+            for k in range(m):
+                if assignment[k]: marginal[k] += weight
+            return
+        for pit in (False, True):
+            # Poda: nenhuma restrição pode passar da contagem nem ficar sem
+            # células suficientes para completá-la
+            if any(not 0 <= need[j] - pit <= left[j] - 1 for j in watch[i]):
+                continue
+            for j in watch[i]:
+                need[j] -= pit
+                left[j] -= 1
+            assignment[i] = pit
+            search(i + 1, weight * odds if pit else weight)
+            for j in watch[i]:
+                need[j] += pit
+                left[j] += 1
+        assignment[i] = False
+
+    search(0, 1.0)
+    if total == 0.0:
+        return None
+    return tuple((cell, marginal[i] / total) for i, cell in enumerate(cells))
+
+
+def pit_components(P_pit, breezes, seeds):
+    # Componentes alcançadas a partir das brisas em `seeds`. Variáveis são as
+    # células vizinhas de brisa com 0 < P < 1; cada brisa vira a restrição
+    # "entre estas células há exatamente `need` buracos" (a contagem menos os
+    # buracos já certos). Gera (células, restrições).
+    table = neighbor_table(P_pit.shape[-1])
+    seen = set()
+    for start in seeds:
+        if start in seen or start not in breezes:
+            continue
+        seen.add(start)
+        stack = [start]
+        cells = set()
+        constraints = []
+        while stack:
+            breeze = stack.pop()
+            need = breezes[breeze]
+            unknown = []
+            for n in table[breeze]:
+                if P_pit[n] == 1.0: need -= 1
+                elif P_pit[n] > 0.0: unknown.append(n)
+            if not unknown:
+                continue
+            constraints.append((tuple(sorted(unknown)), need))
+            for n in unknown:
+                if n in cells:
+                    continue
+                cells.add(n)
+                for other in table[n]:
+                    if other in breezes and other not in seen:
+                        seen.add(other)
+                        stack.append(other)
+        if constraints:
+            yield cells, constraints
+
+
+def exact_pit_update(P_pit, breezes, seeds, max_cells=EXACT_PIT_CELLS):
+    # Troca o risco heurístico pelo posterior exato nas componentes
+    # alcançadas a partir de `seeds`. Devolve (resolvidas, deixadas na
+    # heurística por passarem de max_cells ou serem inconsistentes).
+    solved = skipped = 0
+    for cells, constraints in pit_components(P_pit, breezes, seeds):
+        if len(cells) > max_cells:
+            skipped += 1
+            continue
+        # Chave relativa ao canto da componente: o mesmo formato em outro
+        # lugar (ou em outro jogo) sai do mesmo cache
+        ox = min(x for x, _ in cells)
+        oy = min(y for _, y in cells)
+        key = tuple(sorted((tuple((x - ox, y - oy) for x, y in group), need) for group, need in constraints))
+        posterior = component_posterior(key, PIT_PRIOR)
+        if posterior is None:
+            skipped += 1
+            continue
+        for (x, y), p in posterior:
+            P_pit[x + ox, y + oy] = p
+        solved += 1
+    return solved, skipped
+
+
+# --- BUSCA DE CAMINHO ---
+def a_star_search(risk, start, goal, tolerance=0.5):
+    # A* sobre a grade de risco (P_wumpus + P_pit). Células com risco acima
+    # da tolerância são bloqueadas; as demais custam 1 + risco * 100.
+    size = risk.shape[0]
+    frontier = []
+    heapq.heappush(frontier, (0, start))
+    came_from = {start: None}
+    cost_so_far = {start: 0}
+
+    while frontier:
+        _, current = heapq.heappop(frontier)
+        if current == goal: break
+        x, y = current
+        neighbors = []
+        if x > 0: neighbors.append((x-1, y))
+        if x < size-1: neighbors.append((x+1, y))
+        if y > 0: neighbors.append((x, y-1))
+        if y < size-1: neighbors.append((x, y+1))
+
+        for next_pos in neighbors:
+            cell_risk = risk[next_pos]
+            if cell_risk > tolerance: continue
+            new_cost = cost_so_far[current] + 1 + (cell_risk * 100)
+            if next_pos not in cost_so_far or new_cost < cost_so_far[next_pos]:
+                cost_so_far[next_pos] = new_cost
+                priority = new_cost + abs(next_pos[0] - goal[0]) + abs(next_pos[1] - goal[1])
+                heapq.heappush(frontier, (priority, next_pos))
+                came_from[next_pos] = current
+
+    if goal not in came_from: return []
+    path = []
+    curr = goal
+    while curr != start:
+        path.append(curr)
+        curr = came_from[curr]
+    path.reverse()
+    return path
+
+
+class TwoTierPlanner:
+    # Planejador padrão: as duas tolerâncias do choose_action (0.0 e depois
+    # 0.3) numa única busca A* refeita a cada passo, sem estado entre passos.
+    # Cada nó é (x, y, camada): a camada 0 só anda por células de risco
+    # zero; entrar numa célula com risco em (0, tolerance] leva para a
+    # camada 1. A heurística da camada 1 soma `penalty`, maior que o custo
+    # de qualquer caminho, então a camada 0 é esgotada primeiro (o mesmo A*
+    # com tolerância 0.0, na mesma ordem) e só sem caminho seguro a busca
+    # continua pela camada 1, sem repetir o que já foi expandido.
+    def __init__(self, size, tolerance=0.3):
+        self.size = size
+        self.tolerance = tolerance
+        self.penalty = (1 + 100 * tolerance) * size * size + 1  # > custo de qualquer caminho
+        self.expansions = 0  # expansões reais (pops do heap) na última chamada
+
+    def reset(self):
+        pass
+
+    def plan(self, risk, start, goal):
+        # Caminho (lista de células, sem a posição atual) de start até goal
+        size, tolerance, penalty = self.size, self.tolerance, self.penalty
+        gx, gy = goal
+        first = (start[0], start[1], 0)
+        frontier = [(0, first)]
+        came_from = {first: None}
+        cost_so_far = {first: 0}
+        closed = set()
+        end = None
+
+        while frontier:
+            _, current = heapq.heappop(frontier)
+            if current in closed: continue  # entrada velha: já expandido com custo menor
+            x, y, layer = current
+            if x == gx and y == gy:
+                end = current
+                break
+            closed.add(current)
+            neighbors = []
+            if x > 0: neighbors.append((x-1, y))
+            if x < size-1: neighbors.append((x+1, y))
+            if y > 0: neighbors.append((x, y-1))
+            if y < size-1: neighbors.append((x, y+1))
+
+            for nx, ny in neighbors:
+                cell_risk = risk[nx, ny]
+                if cell_risk > tolerance: continue
+                next_node = (nx, ny, layer if cell_risk == 0 else 1)
+                new_cost = cost_so_far[current] + 1 + (cell_risk * 100)
+                if next_node not in cost_so_far or new_cost < cost_so_far[next_node]:
+                    cost_so_far[next_node] = new_cost
+                    priority = new_cost + abs(nx - gx) + abs(ny - gy) + (penalty if next_node[2] else 0)
+                    heapq.heappush(frontier, (priority, next_node))
+                    came_from[next_node] = current
+
+        self.expansions = len(closed)
+        if end is None: return []
+        path = []
+        while end != first:
+            path.append((end[0], end[1]))
+            end = came_from[end]
+        path.reverse()
+        return path
+
+
+INF = float('inf')
+
+
+@lru_cache(maxsize=BOARD_CACHE_SIZE)
+def grid_adjacency(size):
+    # Vizinhos de cada célula em ordem crescente de posição: nos empates de
+    # custo o caminho prefere a menor (x, y), a mesma ordem usada na escolha
+    # do alvo e nos empates do heap do A*
+    adjacency = [[[] for _ in range(size)] for _ in range(size)]
+    for x in range(size):
+        for y in range(size):
+            if x > 0: adjacency[x][y].append((x-1, y))
+            if y > 0: adjacency[x][y].append((x, y-1))
+            if y < size-1: adjacency[x][y].append((x, y+1))
+            if x < size-1: adjacency[x][y].append((x+1, y))
+    return adjacency
+
+
+class IncrementalPlanner:
+    # Opcional (BayesianAgent(size, incremental_planner=True)); o padrão é o
+    # TwoTierPlanner. Replanejamento incremental no estilo D* Lite (Koenig &
+    # Likhachev).
+    # A busca é feita de trás para frente (do alvo até o agente), então
+    # quando o agente anda e o alvo continua o mesmo, os valores g já
+    # calculados continuam válidos: só as células cujo custo mudou e que
+    # fazem parte da região já explorada precisam ser reparadas.
+    #
+    # As duas tolerâncias do choose_action (0.0 e depois 0.3) viram uma só
+    # busca num grafo de duas camadas: o agente começa na camada 0, que só
+    # anda por células de risco exatamente zero; entrar numa célula com
+    # risco em (0, 0.3] leva para a camada 1. Chegar ao alvo pela camada 1
+    # custa uma penalidade maior que qualquer caminho, então um caminho
+    # 100% seguro sempre vence (como o A* com tolerância 0.0) e, se ele não
+    # existir, sai o caminho mais barato com tolerância 0.3.
+    #
+    # O P_wumpus se espalha pelo tabuleiro todo a cada passo; para que essas
+    # variações mínimas não invalidem a árvore inteira, o custo
+    # 1 + risco * 100 é arredondado em passos de `resolution`. O bloqueio
+    # (risco > tolerância) e a camada (risco == 0) usam o risco exato.
+    def __init__(self, size, tolerance=0.3, resolution=0.1):
+        self.size = size
+        self.adjacency = grid_adjacency(size)
+        self.tolerance = tolerance
+        self.resolution = resolution
+        self.penalty = (1 + 100 * tolerance) * size * size + 1  # > custo de qualquer caminho
+        self.goal = None
+        self.expansions = 0  # expansões reais (pops do heap) na última chamada
+
+    def cell_costs(self, risk):
+        # Custo de entrar em cada célula (inf = bloqueada)
+        cost = 1 + np.round(risk * 100 / self.resolution) * self.resolution
+        cost[risk > self.tolerance] = np.inf
+        return cost
+
+    def heuristic(self, a, b):
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    def successors(self, node):
+        # (vizinho, custo) saindo de node = (x, y, camada)
+        x, y, layer = node
+        for nx, ny in self.adjacency[x][y]:
+            c = self.cost_list[nx][ny]
+            if c == INF: continue
+            if self.zero_list[nx][ny]: yield (nx, ny, layer), c
+            else: yield (nx, ny, 1), c
+
+    def reachable(self, u):
+        # Na camada 0 só se está em células de risco zero (ou na posição
+        # atual do agente); os demais nós da camada 0 nunca aparecem num
+        # caminho e não precisam ser mantidos
+        x, y, layer = u
+        return layer == 1 or self.zero_list[x][y] or u == self.start
+
+    def predecessors(self, node):
+        # Nós que chegam em node = (x, y, camada) com um passo
+        x, y, layer = node
+        if self.cost_list[x][y] == INF:
+            return []
+        if layer == 0:
+            layers = (0,) if self.zero_list[x][y] else ()
+        else:
+            layers = (1,) if self.zero_list[x][y] else (0, 1)
+        return [u for nx, ny in self.adjacency[x][y] for t in layers
+                if self.reachable(u := (nx, ny, t))]
+
+    def reset(self):
+        self.goal = None
+
+    def plan(self, risk, start, goal):
+        # Caminho (lista de células, sem a posição atual) de start até goal
+        self.expansions = 0
+        cost = self.cell_costs(risk)
+        zero = risk == 0
+        self.start = (start[0], start[1], 0)
+
+        if goal != self.goal:
+            # Alvo novo: a árvore de busca anterior não serve mais
+            self.goal = goal
+            self.km = 0
+            self.g = {}
+            self.rhs = {(goal[0], goal[1], 0): 0, (goal[0], goal[1], 1): self.penalty}
+            self.open = {}
+            self.heap = []
+            self.settled = np.zeros((self.size, self.size), dtype=bool)
+            self.set_costs(cost, zero)
+            for node in self.rhs: self.push(node)
+        else:
+            # Mesmo alvo: ajusta as chaves pelo deslocamento do agente e
+            # repara só as células exploradas cujo custo mudou
+            self.km += self.heuristic(self.last_start, start)
+            flipped = zero != self.zero
+            changed = ((cost != self.cost) | flipped) & self.settled
+            self.set_costs(cost, zero)
+            for flat in np.flatnonzero(changed):
+                x, y = divmod(int(flat), self.size)
+                for ux, uy in self.adjacency[x][y]:
+                    self.update_vertex((ux, uy, 0))
+                    self.update_vertex((ux, uy, 1))
+            # Células que passaram a ter risco zero ganham um nó na camada 0
+            for flat in np.flatnonzero(flipped & zero):
+                self.update_vertex((*divmod(int(flat), self.size), 0))
+
+        # A posição atual pode ser um nó da camada 0 que não era mantido
+        self.update_vertex(self.start)
+        self.last_start = start
+        self.compute_shortest_path()
+        return self.extract_path()
+
+    def set_costs(self, cost, zero):
+        self.cost, self.zero = cost, zero
+        self.cost_list, self.zero_list = cost.tolist(), zero.tolist()
+
+    def key(self, u):
+        best = min(self.g.get(u, INF), self.rhs.get(u, INF))
+        return (best + abs(self.start[0] - u[0]) + abs(self.start[1] - u[1]) + self.km, best)
+
+    def push(self, u):
+        k = self.key(u)
+        self.open[u] = k
+        heapq.heappush(self.heap, (k, u))
+
+    def update_vertex(self, u):
+        x, y, layer = u
+        if not self.reachable(u):
+            self.open.pop(u, None)
+            return
+        if (x, y) != self.goal:
+            # rhs = min(custo de entrar no vizinho + g do vizinho)
+            g, cost, zero = self.g, self.cost_list, self.zero_list
+            best = INF
+            for nx, ny in self.adjacency[x][y]:
+                c = cost[nx][ny]
+                if c == INF: continue
+                c += g.get((nx, ny, layer if zero[nx][ny] else 1), INF)
+                if c < best: best = c
+            self.rhs[u] = best
+        self.open.pop(u, None)
+        if self.g.get(u, INF) != self.rhs.get(u, INF):
+            self.push(u)
+
+    def compute_shortest_path(self):
+        start = self.start
+        while self.heap:
+            k_old, u = self.heap[0]
+            if self.open.get(u) != k_old:
+                heapq.heappop(self.heap)  # entrada velha (removida ou rechaveada)
+                continue
+            if not (k_old < self.key(start) or self.rhs.get(start, INF) != self.g.get(start, INF)):
+                break
+
+            heapq.heappop(self.heap)
+            del self.open[u]
+            self.expansions += 1
+            g_u, rhs_u = self.g.get(u, INF), self.rhs.get(u, INF)
+            if k_old < self.key(u):
+                self.push(u)
+            elif g_u > rhs_u:
+                self.g[u] = rhs_u
+                self.settled[u[0], u[1]] = True
+                for s in self.predecessors(u):
+                    self.update_vertex(s)
+            else:
+                self.g[u] = INF
+                self.update_vertex(u)
+                for s in self.predecessors(u):
+                    self.update_vertex(s)
+
+    def extract_path(self):
+        node = self.start
+        if self.g.get(node, INF) == INF:
+            return []
+        path = []
+        while (node[0], node[1]) != self.goal and len(path) <= 2 * self.size * self.size:
+            best, best_cost = None, INF
+            for s, c in self.successors(node):
+                c += self.g.get(s, INF) if (s[0], s[1]) != self.goal else self.rhs[s]
+                if c < best_cost: best, best_cost = s, c
+            if best is None:
+                return []
+            path.append((best[0], best[1]))
+            node = best
+        return path
+
+
+# --- MEDIÇÃO POR FASE ---
+class PhaseProfiler:
+    # Tempo acumulado e número de chamadas de cada fase do agente, mais
+    # contadores de trabalho (expansões do planejador, varreduras da
+    # inferência). Opcional: sem profiler o agente só paga um `if`.
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+
+    def lap(self, phase, start):
+        # Fecha a fase iniciada em `start` e devolve o início da próxima
+        now = perf_counter()
+        self.seconds[phase] += now - start
+        self.calls[phase] += 1
+        return now
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def as_dict(self):
+        return {
+            "phases": {phase: {"seconds": self.seconds[phase], "calls": self.calls[phase]} for phase in self.seconds},
+            "counters": dict(self.counters),
+        }
+
+
+def merge_profiles(profiles):
+    # Soma vários PhaseProfiler.as_dict() (jogos, shards) no mesmo formato
+    merged = {"phases": {}, "counters": {}}
+    for profile in profiles:
+        for phase, stats in profile["phases"].items():
+            total = merged["phases"].setdefault(phase, {"seconds": 0.0, "calls": 0})
+            total["seconds"] += stats["seconds"]
+            total["calls"] += stats["calls"]
+        for name, n in profile["counters"].items():
+            merged["counters"][name] = merged["counters"].get(name, 0) + n
+    return merged
+
 
 class BayesianAgent:
-    def __init__(self, size):
+    def __init__(self, size, profile=False, exact_pits=False, incremental_planner=False):
         self.size = size
+        # Posterior exato dos buracos na fronteira (False: só a heurística)
+        self.exact_pits = exact_pits
+        # Tempos por fase (ver PhaseProfiler); None quando desligado
+        self.profiler = PhaseProfiler() if profile else None
         self.P_wumpus = np.ones((size, size))
         self.P_wumpus[0, 0] = 0
         self.P_wumpus /= np.sum(self.P_wumpus)
 
-        self.P_pit = np.ones((size, size)) * 0.15
+        self.P_pit = np.ones((size, size)) * PIT_PRIOR
         self.P_pit[0, 0] = 0.0
 
         self.P_gold = np.ones((size, size))
         self.P_gold[0, 0] = 0
         self.P_gold /= np.sum(self.P_gold)
-        self.nodes_expanded = 0
+        self.nodes_expanded = 0  # expansões reais do planejador
+        # A* de duas camadas refeito a cada passo; o D* Lite (que guarda a
+        # busca entre passos) só compensa com alvos estáveis, então é opcional
+        self.planner = IncrementalPlanner(size) if incremental_planner else TwoTierPlanner(size)
 
         self.current_path = []
         self.visited = set()
         self.history = [(0,0)]
         self.gold_found = False
-        self.breeze_locs = set()
-
-    def predict(self):
-        # Cria uma nova matriz para armazenar a probabilidade atualizada
-        new_P = np.zeros_like(self.P_wumpus)
-
-        # Percorre todas as células do tabuleiro
-        for x in range(self.size):
-            for y in range(self.size):
-                prob = self.P_wumpus[x, y]
-
-                # Se a probabilidade é zero, ignora a célula
-                if prob == 0:
-                    continue
-
-                # 50% da probabilidade: o Wumpus permanece na mesma célula
-                new_P[x, y] += 0.5 * prob
+        # Células com brisa → quantas brisas (= buracos vizinhos) foram sentidas lá
+        self.breeze_locs = {}
 
-                # Calcula os vizinhos da célula
-                neighbors = []
-                if x > 0: neighbors.append((x-1, y))
-                if x < self.size-1: neighbors.append((x+1, y))
-                if y > 0: neighbors.append((x, y-1))
-                if y < self.size-1: neighbors.append((x, y+1))
+        # Índice da fronteira: células não visitadas vizinhas de uma visitada.
+        # Mantido a cada update para que a escolha do alvo não precise
+        # varrer o tabuleiro inteiro.
+        self.frontier = set()
+        self.visited_grid = np.zeros((size, size), dtype=bool)
 
-                # Se existirem vizinhos, o Wumpus distribui 50% para eles
-                if neighbors:
-                    prob_move = (0.5 * prob) / len(neighbors)
-
-                    # Cada vizinho recebe uma fatia igual dessa probabilidade
-                    for nx, ny in neighbors:
-                        new_P[nx, ny] += prob_move
-
-                else:
-                    # Caso raro: célula isolada (sem vizinhos)
-                    # Mantém os outros 50% na própria célula
-                    new_P[x, y] += 0.5 * prob
+    def predict(self):
+        # Modelo de movimento do Wumpus: 50% fica parado e 50% se divide
+        # igualmente entre os vizinhos. Em vez de percorrer célula a célula,
+        # desloca a matriz inteira nas 4 direções (stencil) usando o número
+        # de vizinhos pré-calculado para o tamanho do tabuleiro.
+        self.P_wumpus = predict_wumpus(self.P_wumpus, motion_operator(self.size))
 
-        # Atualiza a matriz de probabilidade do Wumpus
-        self.P_wumpus = new_P
+    def neighbors(self, pos):
+        return neighbor_table(self.size)[pos]
 
     def update(self, percepts, agent_pos):
+        # percepts: código inteiro (WumpusEnvironment com compact_percepts)
+        # ou a lista de strings de sempre
+        profiler = self.profiler
+        if profiler: start = perf_counter()
+        code = encode_percepts(percepts)
         self.visited.add(agent_pos)
         ax, ay = agent_pos
+        neighbors = self.neighbors(agent_pos)
+
+        # A célula atual sai da fronteira e os vizinhos ainda não visitados entram
+        self.visited_grid[ax, ay] = True
+        self.frontier.discard(agent_pos)
+        for n in neighbors:
+            if n not in self.visited: self.frontier.add(n)
 
         if not self.history or self.history[-1] != agent_pos:
             self.history.append(agent_pos)
 
-        if "Brilho" in percepts:
-            likelihood_gold = np.zeros_like(self.P_gold)
-            for x in range(self.size):
-                for y in range(self.size):
-                    dist = abs(x - ax) + abs(y - ay)
-                    if dist <= 1:  # ouro gera brilho na vizinhança imediata
-                        likelihood_gold[x, y] = 1.0
-                    else:
-                        likelihood_gold[x, y] = 0.0
-            self.P_gold *= likelihood_gold
+        # Máscaras de distância Manhattan (raio 1 e 2) vindas do cache
+        near_gold = radius_mask(self.size, agent_pos, 1)
+        near_stench = radius_mask(self.size, agent_pos, STENCH_RADIUS)
+        if profiler: start = profiler.lap("bookkeeping", start)
+
+        if code & GLITTER_BIT:
+            # ouro gera brilho na vizinhança imediata
+            self.P_gold *= near_gold
         else:
             # Se NÃO tem brilho, então ouro não está na vizinhança imediata
-            for x in range(self.size):
-                for y in range(self.size):
-                    dist = abs(x - ax) + abs(y - ay)
-                    if dist <= 1:
-                        self.P_gold[x, y] = 0.0
+            self.P_gold[near_gold] = 0.0
+        if profiler: start = profiler.lap("gold_update", start)
 
         # 1. Wumpus
         self.predict()
-        has_stench = "Fedor" in percepts
-        ax, ay = agent_pos
-        likelihood = np.zeros_like(self.P_wumpus)
-
-        for x in range(self.size):
-            for y in range(self.size):
-                dist = abs(x - ax) + abs(y - ay)
-                if has_stench: likelihood[x, y] = 1.0 if dist <= 2 else 0.0
-                else: likelihood[x, y] = 0.0 if dist <= 2 else 1.0
+        if profiler: start = profiler.lap("predict", start)
+        has_stench = code & STENCH_BIT
 
-        self.P_wumpus *= likelihood
+        if has_stench: self.P_wumpus *= near_stench
+        else: self.P_wumpus *= ~near_stench
         total = np.sum(self.P_wumpus)
         if total > 0: self.P_wumpus /= total
         else: self.P_wumpus = np.ones((self.size, self.size))
+        if profiler: start = profiler.lap("stench_likelihood", start)
 
         # 2. Buracos (Atualização Local)
+        # `dirty`: brisas cuja vizinhança mudou neste passo (a inferência só
+        # revisita essas)
+        dirty = set()
+        cleared = [agent_pos] if self.P_pit[ax, ay] > 0.0 else []
         self.P_pit[ax, ay] = 0.0
-        breeze_count = percepts.count("Brisa")
+        breeze_count = code >> BREEZE_SHIFT
         has_breeze = breeze_count > 0
 
         if has_breeze:
-            self.breeze_locs.add(agent_pos)
+            # Sempre revisitada: o risco heurístico abaixo mexe nos vizinhos
+            dirty.add(agent_pos)
+            self.breeze_locs[agent_pos] = breeze_count
         else:
-            if agent_pos in self.breeze_locs: self.breeze_locs.remove(agent_pos)
-
-        neighbors = []
-        if ax > 0: neighbors.append((ax-1, ay))
-        if ax < self.size-1: neighbors.append((ax+1, ay))
-        if ay > 0: neighbors.append((ax, ay-1))
-        if ay < self.size-1: neighbors.append((ax, ay+1))
+            self.breeze_locs.pop(agent_pos, None)
 
         if not has_breeze:
-            for nx, ny in neighbors: self.P_pit[nx, ny] = 0.0
+            for nx, ny in neighbors:
+                if self.P_pit[nx, ny] > 0.0:
+                    cleared.append((nx, ny))
+                self.P_pit[nx, ny] = 0.0
         else:
             # Risco 0.2 (20%) se tiver 1 brisa. Risco 0.9 (90%) se tiver 2+.
             risk_level = 0.9 if breeze_count >= 2 else 0.2
@@ -128,27 +688,71 @@ class BayesianAgent:
                 if self.P_pit[nx, ny] != 0.0 and self.P_pit[nx, ny] != 1.0:
                     self.P_pit[nx, ny] = max(self.P_pit[nx, ny], risk_level)
 
+        # Células que deixaram de poder ter buraco mudam as brisas vizinhas
+        for cell in cleared:
+            dirty.update(self.neighbors(cell))
+        if profiler: start = profiler.lap("pit_update", start)
+
         # 3. Inferência Lógica (Minesweeper)
-        changed = True
-        while changed:
-            changed = False
-            for (bx, by) in self.breeze_locs:
-                b_neighbors = []
-                if bx > 0: b_neighbors.append((bx-1, by))
-                if bx < self.size-1: b_neighbors.append((bx+1, by))
-                if by > 0: b_neighbors.append((bx, by-1))
-                if by < self.size-1: b_neighbors.append((bx, by+1))
-
-                potential_pits = []
-                for nx, ny in b_neighbors:
-                    if self.P_pit[nx, ny] > 0.0:
-                        potential_pits.append((nx, ny))
-
-                if len(potential_pits) == 1:
-                    px, py = potential_pits[0]
-                    if self.P_pit[px, py] != 1.0:
-                        self.P_pit[px, py] = 1.0 # CERTEZA
-                        changed = True
+        checks = self.infer_pits(dirty)
+        if profiler:
+            start = profiler.lap("inference", start)
+            profiler.count("inference_checks", checks)
+
+        # 4. Posterior exato nas componentes que mudaram (as outras continuam
+        # com o valor já calculado)
+        if self.exact_pits:
+            solved, skipped = exact_pit_update(self.P_pit, self.breeze_locs, dirty)
+            if profiler:
+                profiler.lap("exact_pits", start)
+                profiler.count("exact_components", solved)
+                profiler.count("exact_fallbacks", skipped)
+
+    def infer_pits(self, dirty=None):
+        # Propagação com lista de trabalho. Cada brisa conta exatamente os
+        # buracos vizinhos, então para uma brisa com contagem n:
+        #   - se só n vizinhos ainda podem ter buraco → todos são buracos
+        #   - se n vizinhos já são buracos certos     → os demais são seguros
+        # Uma célula que vira buraco ou segura muda a vizinhança das brisas
+        # ao redor, que voltam para a lista. Só as brisas em `dirty` (todas,
+        # se None) começam na lista; as que entram depois também são
+        # acrescentadas a `dirty`. Devolve quantas brisas foram examinadas.
+        P_pit = self.P_pit
+        breeze_locs = self.breeze_locs
+        table = neighbor_table(self.size)
+        if dirty is None:
+            work = list(breeze_locs)
+        else:
+            work = [cell for cell in dirty if cell in breeze_locs]
+        queued = set(work)
+        checks = 0
+
+        while work:
+            cell = work.pop()
+            queued.discard(cell)
+            checks += 1
+            count = breeze_locs[cell]
+
+            candidates = [n for n in table[cell] if P_pit[n] > 0.0]
+            unknown = [n for n in candidates if P_pit[n] != 1.0]
+            if not unknown:
+                continue
+            if len(candidates) == count:
+                value = 1.0  # CERTEZA: todos os candidatos são buracos
+            elif len(candidates) - len(unknown) == count:
+                value = 0.0  # todos os buracos desta brisa já foram achados
+            else:
+                continue
+
+            for n in unknown:
+                P_pit[n] = value
+                for b in table[n]:
+                    if b in breeze_locs and b not in queued:
+                        queued.add(b)
+                        work.append(b)
+                        if dirty is not None:
+                            dirty.add(b)
+        return checks
 
     def heuristic(self, a, b):
         return abs(a[0] - b[0]) + abs(a[1] - b[1])
@@ -170,121 +774,248 @@ class BayesianAgent:
             # - menor distância
         # 4 - Retorna a célula mais promissora → a menos perigosa disponível
     def super_safe_fallback(self, current_pos):
-        candidates = []
-        for x in range(self.size):
-            for y in range(self.size):
-                pos = (x, y)
-                if pos in self.visited: continue
-                risk = self.P_wumpus[x, y] + self.P_pit[x, y]
-                dist = abs(x - current_pos[0]) + abs(y - current_pos[1])
-                candidates.append((risk, dist, pos))
-        if not candidates: return None
-        candidates.sort()
-        return candidates[0][2]
-
+        risk = self.P_wumpus + self.P_pit
+        dist = distance_field(self.size, current_pos)
+        target = masked_argmin(risk[None], dist[None], ~self.visited_grid[None])[0]
+        if target[0] < 0: return None
+        return (int(target[0]), int(target[1]))
 
     def find_best_target(self, current_pos):
-        frontier = []
-        for x in range(self.size):
-            for y in range(self.size):
-                pos = (x, y)
-                if pos in self.visited: 
-                    continue
-                # verifica se está na fronteira (adjacente a uma célula visitada)
-                is_frontier = False
-                px, py = pos
-                neighbors = []
-                if px > 0: neighbors.append((px-1, py))
-                if px < self.size-1: neighbors.append((px+1, py))
-                if py > 0: neighbors.append((px, py-1))
-                if py < self.size-1: neighbors.append((px, py+1))
-
-                for n in neighbors:
-                    if n in self.visited:
-                        is_frontier = True
-                        break
-
-                if not is_frontier:
-                    # o agente não vê ainda — empurra para baixo na prioridade
-                    continue
-
-                # risco + distância para ordenação
-                risk = self.P_wumpus[x, y] + self.P_pit[x, y]
-                dist = abs(x - current_pos[0]) + abs(y - current_pos[1])
-
-                frontier.append((risk, dist, pos))
-            self.nodes_expanded += 1
         # se existem células na fronteira, usa elas
-        if frontier:
-            frontier.sort()
-            return frontier[0][2]
+        if self.frontier:
+            return self.select_target(self.frontier, current_pos)
 
         # fallback: caso a fronteira acabe, usar o método pra cenários extremos
-        return super_safe_fallback(self, current_pos)
+        return self.super_safe_fallback(current_pos)
 
-    
-    def a_star(self, start, goal, tolerance=0.5):
-        frontier = []
-        heapq.heappush(frontier, (0, start))
-        came_from = {start: None}
-        cost_so_far = {start: 0}
+    def select_target(self, cells, current_pos):
+        # Menor (risco, distância, posição) entre as células dadas. O risco do
+        # Wumpus muda no tabuleiro todo a cada predict, então as chaves são
+        # recalculadas em bloco (só para as células da fronteira) em vez de
+        # mantidas num heap que teria de ser refeito a cada passo.
+        xs, ys = np.array(list(cells)).T
+        risk = self.P_wumpus[xs, ys] + self.P_pit[xs, ys]
+        dist = np.abs(xs - current_pos[0]) + np.abs(ys - current_pos[1])
+        best = np.lexsort((ys, xs, dist, risk))[0]
+        return (int(xs[best]), int(ys[best]))
 
-        while frontier:
-            _, current = heapq.heappop(frontier)
-            if current == goal: break
-            x, y = current
-            neighbors = []
-            if x > 0: neighbors.append((x-1, y))
-            if x < self.size-1: neighbors.append((x+1, y))
-            if y > 0: neighbors.append((x, y-1))
-            if y < self.size-1: neighbors.append((x, y+1))
-
-            for next_pos in neighbors:
-                risk = self.P_wumpus[next_pos] + self.P_pit[next_pos]
-                if risk > tolerance: continue
-                new_cost = cost_so_far[current] + 1 + (risk * 100)
-                if next_pos not in cost_so_far or new_cost < cost_so_far[next_pos]:
-                    cost_so_far[next_pos] = new_cost
-                    priority = new_cost + self.heuristic(next_pos, goal)
-                    heapq.heappush(frontier, (priority, next_pos))
-                    came_from[next_pos] = current
-
-        if goal not in came_from: return []
-        path = []
-        curr = goal
-        while curr != start:
-            path.append(curr)
-            curr = came_from[curr]
-        path.reverse()
-        self.current_path = path
+
+    def a_star(self, start, goal, tolerance=0.5):
+        path = a_star_search(self.P_wumpus + self.P_pit, start, goal, tolerance)
+        if path: self.current_path = path
         return path
 
     def choose_action(self, agent_pos, actual_gold_pos):
+        profiler = self.profiler
+        if profiler: start = perf_counter()
+
         # 1. Se o agente achou o ouro (detectou brilho)
         if self.gold_found:
             target = actual_gold_pos
         else:
             target = self.find_best_target(agent_pos)
+        if profiler: start = profiler.lap("target_selection", start)
 
         if target is None:
             return None
 
-        # Caminho seguro
-        path = self.a_star(agent_pos, target, tolerance=0.0)
-
-        # Caso extremo: tenta com tolerância maior
-        if not path:
-            path = self.a_star(agent_pos, target, tolerance=0.3)
+        # Caminho seguro (ou, no caso extremo, com tolerância 0.3) numa só busca
+        path = self.planner.plan(self.P_wumpus + self.P_pit, agent_pos, target)
+        self.nodes_expanded += self.planner.expansions
+        if profiler:
+            profiler.lap("planning", start)
+            profiler.count("planner_expansions", self.planner.expansions)
 
         if not path:
             return None
 
-        next_step = path[0]
-        dx = next_step[0] - agent_pos[0]
-        dy = next_step[1] - agent_pos[1]
+        self.current_path = path
+        return step_action(agent_pos, path[0])
+
+# --- AGENTE EM LOTE (N JOGOS) ---
+def step_action(pos, next_pos):
+    # Converte o próximo passo do caminho na ação correspondente
+    dx = next_pos[0] - pos[0]
+    dy = next_pos[1] - pos[1]
+    if dx == -1: return 'N'
+    if dx == 1: return 'S'
+    if dy == 1: return 'L'
+    if dy == -1: return 'O'
+    return None
+
+
+class BatchedBayesianAgent:
+    # Versão em lote do BayesianAgent: as crenças de N jogos ficam empilhadas
+    # em arrays (N, size, size) e predict/update rodam para todos de uma vez.
+    # Cada jogo segue exatamente as regras do BayesianAgent, então o slot i
+    # toma as mesmas decisões que um BayesianAgent jogando o mesmo jogo.
+    # Só o planejamento de caminho continua sendo feito jogo a jogo.
+    def __init__(self, num_envs, size, exact_pits=False, incremental_planner=False):
+        self.num_envs = num_envs
+        self.size = size
+        self.exact_pits = exact_pits
+        self.P_wumpus = np.zeros((num_envs, size, size))
+        self.P_pit = np.zeros((num_envs, size, size))
+        self.P_gold = np.zeros((num_envs, size, size))
+        self.visited = np.zeros((num_envs, size, size), dtype=bool)
+        self.breeze = np.zeros((num_envs, size, size), dtype=np.int8)  # brisas sentidas em cada célula
+        self.frontier = np.zeros((num_envs, size, size), dtype=bool)
+        self.gold_found = np.zeros(num_envs, dtype=bool)
+        self.nodes_expanded = np.zeros(num_envs, dtype=np.int64)
+        self.current_path = [[] for _ in range(num_envs)]
+        planner = IncrementalPlanner if incremental_planner else TwoTierPlanner
+        self.planners = [planner(size) for _ in range(num_envs)]
+        self.reset()
+
+    def reset(self, mask=None):
+        # Reinicia as crenças dos slots marcados (todos, por padrão)
+        slots = self._slots(mask)
+        prior = BayesianAgent(self.size)
+        self.P_wumpus[slots] = prior.P_wumpus
+        self.P_pit[slots] = prior.P_pit
+        self.P_gold[slots] = prior.P_gold
+        self.visited[slots] = False
+        self.breeze[slots] = 0
+        self.frontier[slots] = False
+        self.gold_found[slots] = False
+        self.nodes_expanded[slots] = 0
+        for i in slots:
+            self.current_path[i] = []
+            self.planners[i].reset()
+
+    def _slots(self, mask):
+        if mask is None:
+            return np.arange(self.num_envs)
+        return np.flatnonzero(mask)
+
+    def predict(self, mask=None):
+        slots = self._slots(mask)
+        self.P_wumpus[slots] = predict_wumpus(self.P_wumpus[slots], motion_operator(self.size))
+
+    def update(self, percepts, agent_pos, mask=None):
+        # percepts: (brilho, fedor, brisas) em arrays (N,), como em
+        # VectorizedWumpusEnvironment.get_observation, ou os códigos uint8
+        # (N,) de compact_percepts; agent_pos: (N, 2)
+        if isinstance(percepts, np.ndarray):
+            percepts = unpack_percepts(percepts)
+        glitter, stench, breeze = percepts
+        slots = self._slots(mask)
+        if len(slots) == 0:
+            return
+        size = self.size
+        pos = agent_pos[slots]
+        rows = np.arange(len(slots))
+        ax, ay = pos[:, 0], pos[:, 1]
+        self.visited[slots, ax, ay] = True
+
+        near_gold = window_stack(radius_kernel(size, 1), size, pos)
+        near_stench = window_stack(radius_kernel(size, STENCH_RADIUS), size, pos)
+
+        # Ouro: brilho mantém só a vizinhança; sem brilho zera a vizinhança
+        P_gold = self.P_gold[slots]
+        has_glitter = glitter[slots][:, None, None]
+        self.P_gold[slots] = np.where(has_glitter, P_gold * near_gold, np.where(near_gold, 0.0, P_gold))
+
+        # 1. Wumpus
+        P_wumpus = predict_wumpus(self.P_wumpus[slots], motion_operator(size))
+        has_stench = stench[slots][:, None, None]
+        P_wumpus *= np.where(has_stench, near_stench, ~near_stench)
+        total = P_wumpus.reshape(len(slots), -1).sum(axis=1)
+        positive = total > 0
+        P_wumpus[positive] /= total[positive, None, None]
+        P_wumpus[~positive] = 1.0
+        self.P_wumpus[slots] = P_wumpus
 
-        if dx == -1: return 'N'
-        if dx == 1: return 'S'
-        if dy == 1: return 'L'
-        if dy == -1: return 'O'
-        return None
\ No newline at end of file
+        # 2. Buracos (Atualização Local)
+        P_pit = self.P_pit[slots]
+        P_pit[rows, ax, ay] = 0.0
+        breeze_count = breeze[slots]
+        has_breeze = (breeze_count > 0)[:, None, None]
+        self.breeze[slots, ax, ay] = breeze_count
+
+        neighbors = near_gold.copy()
+        neighbors[rows, ax, ay] = False
+        P_pit[neighbors & ~has_breeze] = 0.0
+
+        # Fronteira mantida a cada passo, como no BayesianAgent
+        frontier = self.frontier[slots]
+        frontier[rows, ax, ay] = False
+        self.frontier[slots] = frontier | (neighbors & ~self.visited[slots])
+
+        # Risco 0.2 (20%) se tiver 1 brisa. Risco 0.9 (90%) se tiver 2+.
+        risk_level = np.where(breeze_count >= 2, 0.9, 0.2)[:, None, None]
+        uncertain = neighbors & has_breeze & (P_pit != 0.0) & (P_pit != 1.0)
+        P_pit = np.where(uncertain, np.maximum(P_pit, risk_level), P_pit)
+
+        # 3. Inferência Lógica (Minesweeper): as mesmas regras de contagem do
+        # BayesianAgent.infer_pits, aplicadas ao lote inteiro até nada mudar.
+        # As regras só acrescentam certezas, então o ponto fixo é o mesmo
+        # da lista de trabalho, qualquer que seja a ordem.
+        breeze = self.breeze[slots]
+        has_breeze = breeze > 0
+        while True:
+            candidates = P_pit > 0.0
+            pits = P_pit == 1.0
+            unknown = candidates & ~pits
+            all_pits = has_breeze & (count_adjacent(candidates) == breeze)
+            all_found = has_breeze & (count_adjacent(pits) == breeze)
+            new_pits = unknown & (count_adjacent(all_pits) > 0)
+            new_safe = unknown & (count_adjacent(all_found) > 0)
+            if not (new_pits.any() or new_safe.any()):
+                break
+            P_pit[new_safe] = 0.0
+            P_pit[new_pits] = 1.0
+
+        # 4. Posterior exato, jogo a jogo. Aqui todas as componentes são
+        # recalculadas; as que não mudaram saem do cache com o mesmo valor
+        # que o BayesianAgent manteve.
+        if self.exact_pits:
+            for row in range(len(slots)):
+                xs, ys = np.nonzero(breeze[row])
+                counts = breeze[row, xs, ys].tolist()
+                breezes = dict(zip(zip(xs.tolist(), ys.tolist()), counts))
+                exact_pit_update(P_pit[row], breezes, breezes)
+        self.P_pit[slots] = P_pit
+
+    def find_best_targets(self, agent_pos, mask=None):
+        # Alvo de cada slot: célula da fronteira (não visitada e vizinha de uma
+        # visitada) com menor (risco, distância); sem fronteira, qualquer
+        # célula não visitada (plano de emergência). (N, 2), -1 se não houver.
+        slots = self._slots(mask)
+        targets = np.full((self.num_envs, 2), -1, dtype=np.int64)
+        if len(slots) == 0:
+            return targets
+        size = self.size
+        visited = self.visited[slots]
+        frontier = self.frontier[slots]
+        has_frontier = frontier.reshape(len(slots), -1).any(axis=1)
+        candidates = np.where(has_frontier[:, None, None], frontier, ~visited)
+
+        risk = self.P_wumpus[slots] + self.P_pit[slots]
+        dist = window_stack(distance_kernel(size), size, agent_pos[slots])
+        targets[slots] = masked_argmin(risk, dist, candidates)
+        return targets
+
+    def choose_actions(self, agent_pos, actual_gold_pos, mask=None):
+        # Devolve (N,) com o índice da ação em ACTIONS ou NO_ACTION quando
+        # o agente do slot ficou sem plano
+        slots = self._slots(mask)
+        actions = np.full(self.num_envs, NO_ACTION, dtype=np.int64)
+        targets = self.find_best_targets(agent_pos, mask)
+        targets[self.gold_found] = actual_gold_pos[self.gold_found]
+
+        for i in slots:
+            if targets[i, 0] < 0:
+                continue
+            start = (int(agent_pos[i, 0]), int(agent_pos[i, 1]))
+            goal = (int(targets[i, 0]), int(targets[i, 1]))
+            path = self.planners[i].plan(self.P_wumpus[i] + self.P_pit[i], start, goal)
+            self.nodes_expanded[i] += self.planners[i].expansions
+            if not path:
+                continue
+
+            self.current_path[i] = path
+            action = step_action(start, path[0])
+            if action is not None:
+                actions[i] = ACTIONS.index(action)
+        return actions
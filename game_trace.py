@@ -0,0 +1,195 @@
+import os
+
+import numpy as np
+
+from wumpus_environment import ACTION_CODES, ACTIONS, STAY, decode_percepts, encode_percepts, floor_tiles
+
+
+# Trace de um jogo: tudo o que é preciso para assistir a partida de novo
+# (voltar, avançar, mudar a velocidade) sem rodar o agente outra vez.
+#
+# Por passo t (t = 0 é o estado inicial, antes da primeira ação):
+#   actions[t-1]        código da ação (ACTIONS) que levou ao passo t
+#   agent_pos[t]        posição do agente            (int16, (T+1, 2))
+#   wumpus_pos[t]       posição do Wumpus            (int16, (T+1, 2))
+#   percepts[t]         percepções em um byte (encode_percepts, em wumpus_environment)
+#   messages[t]         índice em message_table (mensagem do ambiente)
+#   plans               caminho planejado em cada passo, concatenado, com
+#                       plan_offsets[t]:plan_offsets[t+1] sendo o do passo t
+#
+# As crenças (P_wumpus, P_pit, P_gold) são opcionais e guardadas só a cada
+# belief_every passos, quantizadas em uint8 relativas ao máximo de cada mapa
+# naquele passo (belief_scale). Na reprodução, um passo sem foto usa a foto
+# anterior mais próxima.
+BELIEF_MAPS = ("P_wumpus", "P_pit", "P_gold")
+TRACE_DIR = os.environ.get("WUMPUS_TRACE_DIR", "traces")
+
+
+class GameTrace:
+    def __init__(self, size, gold_pos, pits_pos, actions, agent_pos, wumpus_pos, percepts,
+                 messages, message_table, plan_offsets, plans, belief_every=0,
+                 belief_steps=None, beliefs=None, belief_scale=None, outcome="", score=0):
+        self.size = size
+        self.gold_pos = tuple(gold_pos)
+        self.pits_pos = [tuple(p) for p in pits_pos]
+        self.actions = actions
+        self.agent_pos = agent_pos
+        self.wumpus_pos = wumpus_pos
+        self.percepts = percepts
+        self.messages = messages
+        self.message_table = list(message_table)
+        self.plan_offsets = plan_offsets
+        self.plans = plans
+        self.belief_every = belief_every
+        self.belief_steps = belief_steps if belief_steps is not None else np.zeros(0, dtype=np.int32)
+        self.beliefs = beliefs if beliefs is not None else np.zeros((0, 3, size, size), dtype=np.uint8)
+        self.belief_scale = belief_scale if belief_scale is not None else np.zeros((0, 3), dtype=np.float32)
+        self.outcome = outcome
+        self.score = score
+
+    @property
+    def num_steps(self):
+        return len(self.actions)
+
+    def plan_at(self, t):
+        return [tuple(p) for p in self.plans[self.plan_offsets[t]:self.plan_offsets[t + 1]].tolist()]
+
+    def beliefs_at(self, t):
+        # Crenças da última foto tirada até o passo t (ou None sem fotos)
+        k = np.searchsorted(self.belief_steps, t, side="right") - 1
+        if k < 0:
+            return None
+        maps = self.beliefs[k] * (self.belief_scale[k][:, None, None] / 255)
+        return dict(zip(BELIEF_MAPS, maps))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(
+            path,
+            size=self.size, gold_pos=self.gold_pos, pits_pos=np.array(self.pits_pos, dtype=np.int16).reshape(-1, 2),
+            actions=self.actions, agent_pos=self.agent_pos, wumpus_pos=self.wumpus_pos,
+            percepts=self.percepts, messages=self.messages, message_table=np.array(self.message_table, dtype=str),
+            plan_offsets=self.plan_offsets, plans=self.plans, belief_every=self.belief_every,
+            belief_steps=self.belief_steps, beliefs=self.beliefs, belief_scale=self.belief_scale,
+            outcome=self.outcome, score=self.score,
+        )
+        return path
+
+    @classmethod
+    def load(cls, file):
+        # file: caminho ou arquivo aberto (ex.: upload do Streamlit)
+        with np.load(file) as data:
+            fields = {key: data[key] for key in data.files}
+        for key in ("size", "belief_every", "score"):
+            fields[key] = int(fields[key])
+        fields["outcome"] = str(fields["outcome"])
+        return cls(**fields)
+
+
+class TraceRecorder:
+    # Grava um jogo enquanto ele roda: criado depois da primeira percepção
+    # (passo 0) e chamado com record(action, obs) depois de cada
+    # env.step + agent.update. belief_every=0 não guarda crenças.
+    def __init__(self, env, agent, belief_every=0):
+        self.env = env
+        self.agent = agent
+        self.belief_every = belief_every
+        self.actions = []
+        self.agent_pos = []
+        self.wumpus_pos = []
+        self.percepts = []
+        self.messages = []
+        self.message_table = {}
+        self.plans = []
+        self.plan_offsets = [0]
+        self.belief_steps = []
+        self.beliefs = []
+        self.belief_scale = []
+        self.snapshot(env.get_observation())
+
+    def snapshot(self, obs):
+        env, agent = self.env, self.agent
+        t = len(self.agent_pos)
+        self.agent_pos.append(env.agent_pos)
+        self.wumpus_pos.append(env.wumpus_pos)
+        self.percepts.append(encode_percepts(obs))
+        self.messages.append(self.message_table.setdefault(env.message, len(self.message_table)))
+        self.plans.extend(agent.current_path)
+        self.plan_offsets.append(len(self.plans))
+
+        if self.belief_every and t % self.belief_every == 0:
+            self.save_beliefs(t)
+
+    def save_beliefs(self, t):
+        maps = np.stack([getattr(self.agent, name) for name in BELIEF_MAPS])
+        scale = maps.reshape(3, -1).max(axis=1)
+        safe = np.where(scale > 0, scale, 1)
+        self.belief_steps.append(t)
+        self.beliefs.append(np.rint(maps / safe[:, None, None] * 255).astype(np.uint8))
+        self.belief_scale.append(scale)
+
+    def record(self, action, obs):
+        self.actions.append(ACTION_CODES.get(action, STAY))
+        self.snapshot(obs)
+
+    def finish(self, outcome=""):
+        # Fecha o trace; a última foto das crenças sempre é guardada
+        last = len(self.agent_pos) - 1
+        if self.belief_every and (not self.belief_steps or self.belief_steps[-1] != last):
+            self.save_beliefs(last)
+
+        size = self.env.size
+        return GameTrace(
+            size=size,
+            gold_pos=self.env.gold_pos,
+            pits_pos=self.env.pits_pos,
+            actions=np.array(self.actions, dtype=np.uint8),
+            agent_pos=np.array(self.agent_pos, dtype=np.int16).reshape(-1, 2),
+            wumpus_pos=np.array(self.wumpus_pos, dtype=np.int16).reshape(-1, 2),
+            percepts=np.array(self.percepts, dtype=np.uint8),
+            messages=np.array(self.messages, dtype=np.uint8),
+            message_table=list(self.message_table),
+            plan_offsets=np.array(self.plan_offsets, dtype=np.int32),
+            plans=np.array(self.plans, dtype=np.int16).reshape(-1, 2),
+            belief_every=self.belief_every,
+            belief_steps=np.array(self.belief_steps, dtype=np.int32),
+            beliefs=np.array(self.beliefs, dtype=np.uint8).reshape(-1, 3, size, size),
+            belief_scale=np.array(self.belief_scale, dtype=np.float32).reshape(-1, 3),
+            outcome=outcome,
+            score=int(self.env.score),
+        )
+
+
+class TraceReplay:
+    # Reproduz um trace passo a passo. Faz o papel do ambiente e do agente
+    # para o LiveView (mesmos atributos), sem recalcular nada.
+    def __init__(self, trace):
+        self.trace = trace
+        self.size = trace.size
+        self.gold_pos = trace.gold_pos
+        self.pits_pos = trace.pits_pos
+        self.floor_map = floor_tiles(trace.size)
+        blank = np.zeros((trace.size, trace.size))
+        self.P_wumpus, self.P_pit, self.P_gold = blank, blank, blank
+        self.seek(0)
+
+    def seek(self, t):
+        trace = self.trace
+        self.step = t
+        self.agent_pos = tuple(trace.agent_pos[t].tolist())
+        self.wumpus_pos = tuple(trace.wumpus_pos[t].tolist())
+        self.message = trace.message_table[trace.messages[t]]
+        self.percepts = decode_percepts(trace.percepts[t])
+        self.current_path = trace.plan_at(t)
+        self.action = ACTIONS[trace.actions[t - 1]] if 0 < t and trace.actions[t - 1] < len(ACTIONS) else None
+
+        # Histórico como o do agente: só as mudanças de posição
+        positions = trace.agent_pos[:t + 1]
+        moved = np.ones(len(positions), dtype=bool)
+        moved[1:] = (positions[1:] != positions[:-1]).any(axis=1)
+        self.history = [tuple(p) for p in positions[moved].tolist()]
+
+        beliefs = trace.beliefs_at(t)
+        if beliefs is not None:
+            self.P_wumpus, self.P_pit, self.P_gold = beliefs["P_wumpus"], beliefs["P_pit"], beliefs["P_gold"]
+        return self
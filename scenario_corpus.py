@@ -0,0 +1,79 @@
+import argparse
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from wumpus_environment import sample_board, game_seed
+
+
+# Corpus de cenários: tabuleiros pré-sorteados para que duas versões do agente
+# sejam comparadas exatamente nos mesmos mundos.
+#
+# Cada combinação (tamanho, buracos) vira um arquivo .npy com shape
+# (n_tabuleiros, 2 + n_pits, 2) em uint16, no formato de sample_board:
+# linha 0 = Wumpus, linha 1 = ouro, demais = buracos. O arquivo é aberto com
+# np.memmap (mmap_mode='r'), então só as páginas usadas são lidas e todos os
+# processos do pool compartilham a mesma cópia do sistema operacional.
+CORPUS_DIR = os.environ.get("WUMPUS_CORPUS_DIR", "corpus")
+
+
+def corpus_path(size, n_pits, directory=None):
+    directory = directory or CORPUS_DIR
+    return os.path.join(directory, f"boards_{size}x{size}_{n_pits}pits.npy")
+
+
+def generate_corpus(size, n_pits, num_boards, seed=0, directory=None):
+    # O tabuleiro #k é o mesmo que WumpusEnvironment sortearia com
+    # seed=game_seed(seed, k), então o corpus pode ser refeito a qualquer hora
+    path = corpus_path(size, n_pits, directory)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    # Escreve num arquivo temporário e troca de uma vez: processos que ainda
+    # mapeiam o corpus antigo continuam lendo o arquivo antigo (truncar o
+    # mesmo arquivo derrubaria quem lê além do novo fim com SIGBUS)
+    partial = f"{path}.{os.getpid()}.tmp"
+    boards = np.lib.format.open_memmap(partial, mode="w+", dtype=np.uint16, shape=(num_boards, 2 + n_pits, 2))
+    for k in range(num_boards):
+        boards[k] = sample_board(np.random.default_rng(game_seed(seed, k)), size, n_pits)
+    boards.flush()
+    del boards
+    os.replace(partial, path)
+    return path
+
+
+def corpus_version(path):
+    # Identifica o conteúdo atual do arquivo: muda quando o corpus é
+    # regerado, mesmo que por outro processo
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_ino, stat.st_size
+
+
+def load_corpus(path):
+    # Abre o corpus sem copiar para a memória (leitura sob demanda). O
+    # mapeamento fica em cache por versão do arquivo, então um corpus
+    # regerado é reaberto em vez de servir os tabuleiros antigos
+    return open_corpus(path, corpus_version(path))
+
+
+@lru_cache(maxsize=32)
+def open_corpus(path, version):
+    # version só entra na chave do cache (ver corpus_version)
+    return np.load(path, mmap_mode="r")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um corpus de tabuleiros do Mundo de Wumpus")
+    parser.add_argument("--size", type=int, required=True, help="tamanho do tabuleiro")
+    parser.add_argument("--pits", type=int, required=True, help="número de buracos")
+    parser.add_argument("--boards", type=int, default=10000, help="quantidade de tabuleiros")
+    parser.add_argument("--seed", type=int, default=0, help="seed do corpus")
+    parser.add_argument("--dir", default=None, help=f"diretório de saída (padrão: {CORPUS_DIR})")
+    args = parser.parse_args()
+
+    path = generate_corpus(args.size, args.pits, args.boards, seed=args.seed, directory=args.dir)
+    print(f"{args.boards} tabuleiros salvos em {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,200 @@
-from fastapi import FastAPI
-from fastapi.concurrency import run_in_threadpool
-from besyan_agent import BayesianAgent
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from fastapi.responses import StreamingResponse
+import numpy as np
+from besyan_agent import BayesianAgent, BatchedBayesianAgent, merge_profiles
 from pydantic import BaseModel
+from scenario_corpus import corpus_path, corpus_version, load_corpus
+from game_trace import TraceRecorder, TRACE_DIR
+
+from wumpus_environment import (
+    WumpusEnvironment, VectorizedWumpusEnvironment, as_seed_sequence, game_seed,
+    OUTCOME_VICTORY, OUTCOME_WUMPUS, OUTCOME_PIT, OUTCOME_STUCK, NO_ACTION,
+)
+
+# Quantos jogos o modo vetorizado mantém em paralelo nos arrays
+BATCH_SIZE = 256
+
+# Processos usados pelo /simulate. Pedidos pequenos rodam num único shard,
+# já que abrir trabalho em outro processo também custa.
+SIMULATION_WORKERS = int(os.environ.get("WUMPUS_WORKERS", os.cpu_count() or 1))
+MIN_SHARD_SIZE = 50
+
+# Traces dos jogos perdidos (trace_lost): crenças salvas a cada N passos
+LOST_TRACE_BELIEF_EVERY = 5
+
+# Jogos por pedaço no /simulate/stream: pedaços pequenos fazem o primeiro
+# resultado chegar logo, mesmo quando o pedido é grande
+STREAM_CHUNK = 4
+
+# Fila de jobs (/jobs): quantos jobs podem estar esperando ou rodando ao
+# mesmo tempo (acima disso o pedido é recusado com 429) e quantos rodam de
+# fato em paralelo no pool; os demais ficam na fila
+JOB_QUEUE_DEPTH = int(os.environ.get("WUMPUS_JOB_QUEUE", 16))
+JOB_CONCURRENCY = int(os.environ.get("WUMPUS_JOB_CONCURRENCY", 2))
+JOB_HISTORY = 256  # jobs terminados guardados para consulta
+
+# Maior grade aceita pelo /sweep (pontos size × n_pits)
+MAX_SWEEP_POINTS = 400
+
+_executor = None
 
-from wumpus_environment import WumpusEnvironment
+# Memória compartilhada com os processos do pool, um slot por job ativo:
+# pedido de cancelamento e jogos concluídos (ver run_job_shard)
+_job_cancel = None
+_job_progress = None
 
-app = FastAPI()
+
+def init_worker(cancel, progress):
+    global _job_cancel, _job_progress
+    _job_cancel, _job_progress = cancel, progress
+
+
+def get_executor():
+    # Pool de processos criado na primeira simulação e reaproveitado
+    global _executor
+    if _executor is None:
+        cancel = multiprocessing.Array("b", JOB_QUEUE_DEPTH, lock=False)
+        progress = multiprocessing.Array("q", JOB_QUEUE_DEPTH)
+        init_worker(cancel, progress)
+        _executor = ProcessPoolExecutor(max_workers=SIMULATION_WORKERS, initializer=init_worker,
+                                        initargs=(cancel, progress))
+    return _executor
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    if _executor is not None:
+        # Jobs em andamento param no próximo jogo
+        _job_cancel[:] = [1] * JOB_QUEUE_DEPTH
+        _executor.shutdown(cancel_futures=True)
+
+
+app = FastAPI(lifespan=lifespan)
 
 class SimulationRequest(BaseModel):
     size: int
     n_pits: int
     max_steps: int
     num_simulations: int
+    vectorized: bool = False  # usa o ambiente/agente em lote
+    seed: int | None = None   # mesma seed → mesmos tabuleiros e mesmos totais
+    use_corpus: bool = False  # joga os tabuleiros #0..N-1 do corpus (scenario_corpus.py)
+    trace_lost: bool = False  # salva o trace (game_trace.py) de cada jogo não vencido
+    profile: bool = False     # mede o tempo de cada fase do agente (PhaseProfiler)
+    exact_pits: bool = False  # posterior exato dos buracos na fronteira (ver besyan_agent)
+
 
+class SweepRequest(BaseModel):
+    sizes: list[int]          # tamanhos de tabuleiro (linhas da matriz)
+    n_pits: list[int]         # números de buracos (colunas da matriz)
+    max_steps: int
+    num_simulations: int      # jogos por ponto da grade
+    vectorized: bool = False
+    seed: int | None = None   # a mesma seed em todos os pontos (igual ao /simulate)
+    exact_pits: bool = False
+
+
+# Nome de cada resultado nos registros por jogo e o contador que ele soma
+OUTCOME_NAMES = {
+    OUTCOME_VICTORY: "victory",
+    OUTCOME_WUMPUS: "wumpus",
+    OUTCOME_PIT: "pit",
+    OUTCOME_STUCK: "stuck",
+}
+RESULT_KEYS = {"victory": "victories", "wumpus": "defeats_wumpus", "pit": "defeats_pit", "stuck": "stuck"}
 
 
-def run_multiple_simulations_api(size, n_pits, max_steps, num_simulations):
+def game_record(game, outcome, steps, score, nodes_expanded):
+    # Registro compacto de um jogo terminado (uma linha do /simulate/stream)
+    return {
+        "game": int(game),
+        "outcome": OUTCOME_NAMES[int(outcome)],
+        "steps": int(steps),
+        "score": int(score),
+        "nodes_expanded": int(nodes_expanded),
+    }
+
+
+def summarize_games(records):
     # Dicionário que acumula as métricas de TODAS as simulações
     results = {
         "victories": 0,             # quantas vezes o agente pegou o ouro
         "defeats_wumpus": 0,        # quantas vezes morreu pelo wumpus
         "defeats_pit": 0,           # quantas vezes caiu em um buraco
         "total_steps": 0,           # total de passos somados em todas as simulações
-        "games_played": num_simulations,  # quantidade de jogos simulados
+        "games_played": 0,          # quantidade de jogos simulados
         "stuck": 0,                 # vezes em que o agente travou e não tinha ação
         "total_nodes_expanded": 0,  # total de nós expandidos pelo agente
         "total_score": 0,           # pontuação total bruta
         "average_score": 0
     }
-    
+    records = list(records)
+    for record in records:
+        results[RESULT_KEYS[record["outcome"]]] += 1
+        results["games_played"] += 1
+        results["total_steps"] += record["steps"]
+        results["total_nodes_expanded"] += record["nodes_expanded"]
+        results["total_score"] += record["score"]
+
+    if results["games_played"]:
+        results["average_score"] = results["total_score"] / results["games_played"]
+
+    profiles = [record["profile"] for record in records if "profile" in record]
+    if profiles:
+        results["profile"] = merge_profiles(profiles)
+    return results
+
+
+def play_games(size, n_pits, max_steps, num_simulations, seed=None, first_game=0, corpus=None, trace_dir=None,
+               profile=False, exact_pits=False):
+    # Gera um registro (game_record) por jogo, na ordem dos jogos.
+    # O jogo #k (first_game + sim) usa game_seed(seed, k): assim um pedaço
+    # do experimento pode rodar em outro processo e dar o mesmo resultado.
+    # Com um corpus (caminho do .npy) o jogo #k usa o tabuleiro k do corpus.
+    # Com trace_dir cada jogo é gravado (game_trace.py) e o trace dos jogos
+    # não vencidos é salvo lá; o registro ganha o campo "trace".
+    # Com profile o registro traz os tempos por fase do agente ("profile").
+    seed = as_seed_sequence(seed)
+    boards = load_corpus(corpus) if corpus else None
+
     # Executa N simulações consecutivas
     for sim in range(num_simulations):
 
         # Cria um novo agente e um novo ambiente para cada simulação
-        agent = BayesianAgent(size=size)
-        env = WumpusEnvironment(size=size, n_pits=n_pits)
+        agent = BayesianAgent(size=size, profile=profile, exact_pits=exact_pits)
+        board = boards[first_game + sim] if boards is not None else None
+        env = WumpusEnvironment(size=size, n_pits=n_pits, seed=game_seed(seed, first_game + sim), board=board,
+                                compact_percepts=True)
 
         # Obter a primeira observação e atualizar o agente
         obs = env.get_observation()
         agent.update(obs, env.agent_pos)
+        recorder = TraceRecorder(env, agent, LOST_TRACE_BELIEF_EVERY) if trace_dir else None
         step = 0  # conta quantos passos foram dados neste jogo
+        # Sem plano (nenhuma opção válida) ou sem terminar dentro do limite
+        # de passos → o agente travou
+        outcome = OUTCOME_STUCK
 
         # Loop principal do jogo
         while step <= max_steps:
 
             # Agente decide uma ação baseada no estado atual
             action = agent.choose_action(env.agent_pos, env.gold_pos)
-        
+
             # Quando o agente fica sem plano (nenhum opção válida), ele trava
             if action is None:
-                results["stuck"] += 1
                 break
 
             # Ambiente executa a ação: anda, atualiza posição e retorna a nova percepção
@@ -58,46 +203,647 @@ def run_multiple_simulations_api(size, n_pits, max_steps, num_simulations):
 
             # Atualiza as probabilidades e histórico do agente
             agent.update(obs, env.agent_pos)
+            if recorder:
+                recorder.record(action, obs)
 
             # Se o jogo terminou, checamos o motivo
             if done:
-                if env.agent_pos == env.gold_pos:
-                    # Vitória → ouro encontrado
-                    results["victories"] += 1
-                    break
+                if env.won:
+                    # Vitória → ouro encontrado (o Wumpus pode estar na
+                    # mesma casa do ouro; nesse caso o ambiente conta morte)
+                    outcome = OUTCOME_VICTORY
                 elif env.agent_pos == env.wumpus_pos:
                     # Derrota → wumpus comeu
-                    results["defeats_wumpus"] += 1
-                    break
-                elif env.agent_pos in env.pits_pos:
+                    outcome = OUTCOME_WUMPUS
+                elif env.pit_map[env.agent_pos]:
                     # Derrota → caiu em um buraco
-                    results["defeats_pit"] += 1
-                    break
+                    outcome = OUTCOME_PIT
+                break
 
-        # Soma os passos deste jogo ao total geral
-        results["total_steps"] += step
-        results["total_nodes_expanded"] += agent.nodes_expanded # Soma os nós expandidos pelo agente nesta simulação
-        results["total_score"] += env.score
+        record = game_record(first_game + sim, outcome, step, env.score, agent.nodes_expanded)
+        if profile:
+            record["profile"] = agent.profiler.as_dict()
+        if recorder and outcome != OUTCOME_VICTORY:
+            path = os.path.join(trace_dir, f"game_{first_game + sim:06d}_{record['outcome']}.npz")
+            record["trace"] = recorder.finish(record["outcome"]).save(path)
+        yield record
 
-        # Se o agente não terminou e não ficou sem ação → provavelmente ficou preso
-        if not done and action is not None:
-            results["stuck"] += 1
 
-    results["average_score"] = results["total_score"] / num_simulations
+def run_multiple_simulations_api(size, n_pits, max_steps, num_simulations, seed=None, first_game=0, corpus=None):
     # Retorna todas as métricas consolidadas
+    return summarize_games(play_games(size, n_pits, max_steps, num_simulations, seed, first_game, corpus))
+
+
+def play_batched_games(size, n_pits, max_steps, num_simulations, seed=None, first_game=0,
+                       corpus=None, batch_size=BATCH_SIZE, exact_pits=False):
+    # Mesmo experimento de play_games, mas com até batch_size jogos
+    # avançando juntos em VectorizedWumpusEnvironment e BatchedBayesianAgent.
+    # O jogo #k usa game_seed(seed, k); os registros saem na ordem em que
+    # os jogos terminam.
+    num_envs = min(batch_size, num_simulations)
+    boards = load_corpus(corpus) if corpus else None
+    env = VectorizedWumpusEnvironment(num_envs, size=size, n_pits=n_pits, seed=seed,
+                                      num_games=num_simulations, first_game=first_game, boards=boards,
+                                      compact_percepts=True)
+    agent = BatchedBayesianAgent(num_envs, size=size, exact_pits=exact_pits)
+    nodes_expanded = np.zeros(num_simulations, dtype=np.int64)
+
+    def end_games(mask, outcome):
+        nodes_expanded[env.game_index[mask] - first_game] = agent.nodes_expanded[mask]
+        env.end_games(mask, outcome)
+
+    agent.update(env.get_observation(), env.agent_pos, env.active)
+
+    while env.active.any():
+        playing = env.active.copy()
+        actions = agent.choose_actions(env.agent_pos, env.gold_pos, playing)
+
+        # Agente sem plano (nenhuma opção válida) → travou
+        stuck = playing & (actions == NO_ACTION)
+        end_games(stuck, OUTCOME_STUCK)
+
+        # Os slots que terminaram no step já voltam com o jogo seguinte
+        game_index = env.game_index.copy()
+        _, done, _ = env.step(actions)
+        nodes_expanded[game_index[done] - first_game] = agent.nodes_expanded[done]
+
+        # Passou do limite de passos sem terminar → também conta como travado
+        timeout = env.active & (env.step_count > max_steps)
+        end_games(timeout, OUTCOME_STUCK)
+
+        agent.reset(stuck | done | timeout)
+        agent.update(env.get_observation(), env.agent_pos, env.active)
+
+        for game, outcome, score, steps in env.new_results().tolist():
+            yield game_record(game, outcome, steps, score, nodes_expanded[game - first_game])
+
+
+def run_batched_simulations_api(size, n_pits, max_steps, num_simulations, seed=None, first_game=0,
+                                corpus=None, batch_size=BATCH_SIZE):
+    return summarize_games(play_batched_games(size, n_pits, max_steps, num_simulations, seed,
+                                              first_game, corpus, batch_size))
+
+# --- EXECUÇÃO PARALELA ---
+def shard_ranges(num_simulations, num_shards):
+    # Divide os índices de jogo [0, num_simulations) em faixas contíguas
+    bounds = np.linspace(0, num_simulations, num_shards + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def plan_shards(num_simulations, workers=SIMULATION_WORKERS):
+    # Alguns shards por processo para equilibrar jogos mais longos
+    num_shards = min(workers * 4, max(1, num_simulations // MIN_SHARD_SIZE))
+    return shard_ranges(num_simulations, num_shards)
+
+
+def shard_games(size, n_pits, max_steps, seed, start, stop, vectorized=False, corpus=None, trace_dir=None,
+                profile=False, exact_pits=False):
+    # Registros dos jogos [start, stop) do experimento; cada jogo tem sua
+    # própria seed derivada de `seed`, então o shard é independente e
+    # reprodutível. O corpus vai só como caminho: cada processo abre o
+    # mesmo memmap. Gravar traces e medir fases só é possível no modo
+    # serial (que dá os mesmos jogos do vetorizado).
+    if vectorized and not trace_dir and not profile:
+        return play_batched_games(size, n_pits, max_steps, stop - start, seed=seed, first_game=start, corpus=corpus,
+                                  exact_pits=exact_pits)
+    return play_games(size, n_pits, max_steps, stop - start, seed=seed, first_game=start, corpus=corpus,
+                      trace_dir=trace_dir, profile=profile, exact_pits=exact_pits)
+
+
+def run_shard(size, n_pits, max_steps, seed, start, stop, vectorized=False, corpus=None, trace_dir=None,
+              profile=False, exact_pits=False):
+    # Totais do shard (o que volta do processo é só um dicionário pequeno)
+    return summarize_games(shard_games(size, n_pits, max_steps, seed, start, stop, vectorized, corpus, trace_dir,
+                                       profile, exact_pits))
+
+
+def run_shard_records(size, n_pits, max_steps, seed, start, stop, vectorized=False, corpus=None, trace_dir=None,
+                      profile=False, exact_pits=False):
+    # Registros por jogo do shard, para o /simulate/stream
+    return list(shard_games(size, n_pits, max_steps, seed, start, stop, vectorized, corpus, trace_dir, profile,
+                            exact_pits))
+
+
+def merge_results(shard_results):
+    # Soma os totais de cada shard e recalcula a média no mesmo formato
+    merged = {key: 0 for key in shard_results[0] if key != "profile"}
+    for partial in shard_results:
+        for key, value in partial.items():
+            if key != "profile":
+                merged[key] += value
+    if merged["games_played"]:
+        merged["average_score"] = merged["total_score"] / merged["games_played"]
+
+    profiles = [partial["profile"] for partial in shard_results if "profile" in partial]
+    if profiles:
+        merged["profile"] = merge_profiles(profiles)
+    return merged
+
+
+def run_parallel_simulations_api(size, n_pits, max_steps, num_simulations, seed=None,
+                                 vectorized=False, corpus=None, workers=SIMULATION_WORKERS):
+    # Versão síncrona (scripts e benchmarks) do /simulate em vários processos.
+    # Com a mesma seed o resultado é idêntico ao da execução serial.
+    seed = as_seed_sequence(seed)
+    shards = plan_shards(num_simulations, workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(run_shard, size, n_pits, max_steps, seed, start, stop, vectorized, corpus)
+            for start, stop in shards
+        ]
+        return merge_results([f.result() for f in futures])
+
+
+def request_trace_dir(req):
+    # Pasta onde ficam os traces dos jogos perdidos do pedido. Com seed o
+    # nome é fixo (repetir o pedido regrava os mesmos jogos)
+    if not req.trace_lost:
+        return None
+    if req.seed is None:
+        name = uuid.uuid4().hex
+    else:
+        name = f"seed{req.seed}_{req.size}x{req.size}_{req.n_pits}pits_{req.max_steps}steps"
+        if req.use_corpus:
+            name += "_corpus"
+        if req.exact_pits:
+            name += "_exact"
+    return os.path.join(TRACE_DIR, name)
+
+
+def request_corpus(req):
+    # Caminho do corpus de (size, n_pits) para o pedido, validando que ele
+    # existe e tem tabuleiros suficientes
+    if not req.use_corpus:
+        return None
+    path = corpus_path(req.size, req.n_pits)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"Corpus não encontrado: {path}")
+    available = len(load_corpus(path))
+    if available < req.num_simulations:
+        raise HTTPException(
+            status_code=400,
+            detail=f"O corpus tem {available} tabuleiros, mas foram pedidas {req.num_simulations} simulações",
+        )
+    return path
+
+
+# --- CACHE DE RESULTADOS ---
+class ResultCache:
+    # LRU com validade (TTL, em segundos) para resultados de pedidos
+    # determinísticos, com contadores de acertos e falhas
+    def __init__(self, maxsize=128, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()  # chave → (instante em que entrou, valor)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key is None:
+            return None
+        entry = self.entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] > self.ttl:
+            del self.entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, value):
+        if key is None or self.maxsize <= 0:
+            return
+        self.entries[key] = (time.monotonic(), value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+        }
+
+
+CACHE_MAX_RECORDS = 5000  # maior experimento cujos registros por jogo são guardados
+RESULT_CACHE = ResultCache(
+    maxsize=int(os.environ.get("WUMPUS_CACHE_SIZE", 128)),
+    ttl=float(os.environ.get("WUMPUS_CACHE_TTL", 3600)),
+)
+
+
+def cache_key(kind, req, corpus):
+    # Só pedidos com seed são determinísticos; sem seed não há cache.
+    # A chave é o pedido inteiro (mais a versão do corpus, se usado), e
+    # kind separa os totais ("summary") dos registros por jogo ("records").
+    # Tempos medidos (profile) mudam a cada execução e também ficam de fora.
+    if req.seed is None or req.profile:
+        return None
+    version = corpus_version(corpus) if corpus else None
+    return (kind, tuple(sorted(req.model_dump().items())), version)
+
+
+async def run_simulations_async(req):
+    # Espalha os shards pelo pool de processos sem bloquear o servidor.
+    # Pedidos repetidos (com seed) saem do cache sem ocupar processo nenhum.
+    seed = as_seed_sequence(req.seed)
+    corpus = request_corpus(req)
+    key = cache_key("summary", req, corpus)
+    cached = RESULT_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    trace_dir = request_trace_dir(req)
+    shards = plan_shards(req.num_simulations)
+
+    if len(shards) == 1:
+        # Pedido pequeno: não vale a ida e volta para outro processo
+        results = await run_in_threadpool(
+            run_shard, req.size, req.n_pits, req.max_steps, seed, 0, req.num_simulations, req.vectorized, corpus,
+            trace_dir, req.profile, req.exact_pits
+        )
+    else:
+        loop = asyncio.get_running_loop()
+        executor = get_executor()
+        partials = await asyncio.gather(*[
+            loop.run_in_executor(executor, run_shard, req.size, req.n_pits, req.max_steps,
+                                 seed, start, stop, req.vectorized, corpus, trace_dir, req.profile, req.exact_pits)
+            for start, stop in shards
+        ])
+        results = merge_results(partials)
+
+    if trace_dir:
+        results["trace_dir"] = trace_dir
+    RESULT_CACHE.put(key, results)
     return results
 
+
+def stream_ranges(num_simulations, vectorized=False):
+    # Pedaços do /simulate/stream. No modo serial, STREAM_CHUNK jogos cada.
+    # No vetorizado o primeiro pedaço também tem STREAM_CHUNK jogos e os
+    # seguintes dobram até BATCH_SIZE: o primeiro resultado chega logo e o
+    # resto do experimento ainda roda em lotes grandes.
+    if not vectorized:
+        return shard_ranges(num_simulations, -(-num_simulations // STREAM_CHUNK))
+    ranges, start, chunk = [], 0, STREAM_CHUNK
+    while start < num_simulations:
+        stop = min(start + chunk, num_simulations)
+        ranges.append((start, stop))
+        start, chunk = stop, min(2 * chunk, BATCH_SIZE)
+    return ranges
+
+
+async def stream_game_records(req, corpus):
+    # Registros por jogo assim que cada um termina. Pedidos pequenos rodam
+    # numa thread e saem jogo a jogo; os grandes são quebrados em pedaços
+    # (stream_ranges) no pool de processos e saem conforme cada pedaço fica
+    # pronto (fora da ordem dos jogos; cada registro traz "game").
+    seed = as_seed_sequence(req.seed)
+    trace_dir = request_trace_dir(req)
+
+    if len(plan_shards(req.num_simulations)) == 1:
+        games = shard_games(req.size, req.n_pits, req.max_steps, seed, 0, req.num_simulations, req.vectorized, corpus,
+                            trace_dir, req.profile, req.exact_pits)
+        async for record in iterate_in_threadpool(games):
+            yield record
+        return
+
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    futures = [
+        loop.run_in_executor(executor, run_shard_records, req.size, req.n_pits, req.max_steps,
+                             seed, start, stop, req.vectorized, corpus, trace_dir, req.profile, req.exact_pits)
+        for start, stop in stream_ranges(req.num_simulations, req.vectorized)
+    ]
+    try:
+        for next_chunk in asyncio.as_completed(futures):
+            for record in await next_chunk:
+                yield record
+    finally:
+        # Cliente desconectou: pedaços que ainda não começaram são descartados
+        for future in futures:
+            future.cancel()
+
+
+@app.post("/simulate/stream")
+async def simulate_stream(req: SimulationRequest):
+    # Mesmo experimento do /simulate, em NDJSON: uma linha por jogo terminado
+    # ({"game", "outcome", "steps", "score", "nodes_expanded"}) e, no fim,
+    # uma linha {"summary": {...}} com os mesmos totais do /simulate
+    corpus = request_corpus(req)
+    key = cache_key("records", req, corpus)
+    cached = RESULT_CACHE.get(key)
+
+    async def lines():
+        if cached is not None:
+            records = cached
+            for record in records:
+                yield json.dumps(record) + "\n"
+        else:
+            records = []
+            async for record in stream_game_records(req, corpus):
+                records.append(record)
+                yield json.dumps(record) + "\n"
+        summary = summarize_games(records)
+        if cached is None:
+            # Experimento completo: guarda os totais e, se não forem muitos,
+            # os registros por jogo
+            if len(records) <= CACHE_MAX_RECORDS:
+                RESULT_CACHE.put(key, records)
+            RESULT_CACHE.put(cache_key("summary", req, corpus), summary)
+        yield json.dumps({"summary": summary}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @app.post("/simulate")
 async def simulate(req: SimulationRequest):
-    # Roda a função de simulação pesada em outra thread
-    # Isso evita travar o servidor FastAPI
-    results = await run_in_threadpool(
-        run_multiple_simulations_api,
-        req.size,        # tamanho do tabuleiro
-        req.n_pits,      # quantidade de buracos
-        req.max_steps,   # máximo de passos por simulação
-        req.num_simulations  # número total de simulações
-    )
+    # Roda as simulações pesadas em outros processos (ou em outra thread,
+    # para pedidos pequenos). Isso evita travar o servidor FastAPI
+    results = await run_simulations_async(req)
 
     # Retorna o dicionário com todas as métricas agregadas
-    return results
\ No newline at end of file
+    return results
+
+
+# --- VARREDURA DE PARÂMETROS ---
+def sweep_axes(req):
+    # Eixos da matriz: valores distintos, em ordem crescente
+    return sorted(set(req.sizes)), sorted(set(req.n_pits))
+
+
+def sweep_points(req):
+    # Pontos jogáveis da grade (Wumpus, ouro e buracos em células distintas
+    # fora de (0, 0)), do mais barato ao mais caro: o custo de um jogo cresce
+    # com o tabuleiro (crenças size × size e jogos mais longos)
+    sizes, pits = sweep_axes(req)
+    return [(size, n_pits) for size in sizes for n_pits in pits if 2 <= size and 0 <= n_pits <= size * size - 3]
+
+
+def sweep_point_request(req, size, n_pits):
+    # O ponto é o mesmo pedido de um /simulate: divide o cache com ele
+    return SimulationRequest(size=size, n_pits=n_pits, max_steps=req.max_steps, num_simulations=req.num_simulations,
+                             vectorized=req.vectorized, seed=req.seed, exact_pits=req.exact_pits)
+
+
+def sweep_metrics(summary):
+    games = summary["games_played"]
+    return {
+        "win_rate": summary["victories"] / games if games else 0.0,
+        "average_score": summary["average_score"],
+        "average_steps": summary["total_steps"] / games if games else 0.0,
+    }
+
+
+async def sweep_results(req):
+    # (size, n_pits, totais) de cada ponto assim que todos os seus shards
+    # terminam. Os shards de todos os pontos entram no pool de uma vez, do
+    # ponto mais barato ao mais caro: o pool atende em ordem, então os
+    # pontos baratos chegam primeiro e nenhum processo fica parado
+    # esperando um ponto grande. Pontos já calculados saem do cache.
+    seed = as_seed_sequence(req.seed)
+    loop = asyncio.get_running_loop()
+    cached, remaining, partials, futures = [], {}, {}, {}
+
+    for size, n_pits in sweep_points(req):
+        key = cache_key("summary", sweep_point_request(req, size, n_pits), None)
+        summary = RESULT_CACHE.get(key)
+        if summary is not None:
+            cached.append((size, n_pits, summary))
+            continue
+        shards = plan_shards(req.num_simulations)
+        remaining[size, n_pits] = len(shards)
+        partials[size, n_pits] = []
+        for start, stop in shards:
+            future = loop.run_in_executor(get_executor(), run_shard, size, n_pits, req.max_steps, seed, start, stop,
+                                          req.vectorized, None, None, False, req.exact_pits)
+            futures[future] = (size, n_pits, key)
+
+    try:
+        for point in cached:
+            yield point
+        pending = set(futures)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                size, n_pits, key = futures[future]
+                partials[size, n_pits].append(future.result())
+                remaining[size, n_pits] -= 1
+                if remaining[size, n_pits] == 0:
+                    summary = merge_results(partials.pop((size, n_pits)))
+                    RESULT_CACHE.put(key, summary)
+                    yield size, n_pits, summary
+    finally:
+        # Cliente desconectou: shards que ainda não começaram são descartados
+        for future in futures:
+            future.cancel()
+
+
+@app.post("/sweep")
+async def sweep(req: SweepRequest):
+    # Varredura size × n_pits em NDJSON: uma linha por ponto concluído
+    # ({"size", "n_pits", "win_rate", "average_score", "average_steps",
+    # "summary"}, na ordem em que ficam prontos) e, no fim, {"sweep": {...}}
+    # com os eixos e as matrizes (linha = size, coluna = n_pits; null onde
+    # os buracos não cabem no tabuleiro)
+    points = sweep_points(req)
+    if req.num_simulations < 1 or not points:
+        raise HTTPException(status_code=400, detail="Nenhum ponto jogável na grade pedida")
+    if len(points) > MAX_SWEEP_POINTS:
+        raise HTTPException(status_code=400,
+                            detail=f"A grade tem {len(points)} pontos; o máximo é {MAX_SWEEP_POINTS}")
+    sizes, pits = sweep_axes(req)
+
+    async def lines():
+        grid = {name: [[None] * len(pits) for _ in sizes] for name in ("win_rate", "average_score", "average_steps")}
+        async for size, n_pits, summary in sweep_results(req):
+            metrics = sweep_metrics(summary)
+            for name, value in metrics.items():
+                grid[name][sizes.index(size)][pits.index(n_pits)] = value
+            yield json.dumps({"size": size, "n_pits": n_pits, **metrics, "summary": summary}) + "\n"
+        yield json.dumps({"sweep": {"sizes": sizes, "n_pits": pits, **grid}}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/cache")
+async def cache_stats():
+    # Acertos/falhas do cache de resultados (pedidos com seed)
+    return RESULT_CACHE.stats()
+
+
+# --- FILA DE JOBS ---
+def run_job_shard(slot, size, n_pits, max_steps, seed, start, stop, vectorized=False, corpus=None, trace_dir=None,
+                  profile=False, exact_pits=False):
+    # Shard de um job, rodando no pool: antes de cada jogo confere se o job
+    # foi cancelado e, a cada jogo concluído, soma 1 no progresso do slot.
+    # Cancelado no meio, devolve os totais só dos jogos já jogados.
+    records = []
+    games = shard_games(size, n_pits, max_steps, seed, start, stop, vectorized, corpus, trace_dir, profile,
+                        exact_pits)
+    while not _job_cancel[slot]:
+        record = next(games, None)
+        if record is None:
+            break
+        records.append(record)
+        with _job_progress.get_lock():
+            _job_progress[slot] += 1
+    return summarize_games(records)
+
+
+class SimulationJob:
+    # Um pedido de simulação na fila. status: queued → running → done,
+    # ou cancelled / failed
+    def __init__(self, req, corpus, slot):
+        self.id = uuid.uuid4().hex
+        self.req = req
+        self.corpus = corpus
+        self.slot = slot
+        self.status = "queued"
+        self.games_done = 0
+        self.result = None
+        self.error = None
+        self.futures = []
+        self.task = None
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    def progress(self):
+        if self.status == "running":
+            self.games_done = _job_progress[self.slot]
+        return self.games_done
+
+    def describe(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "games_done": self.progress(),
+            "num_simulations": self.req.num_simulations,
+            "error": self.error,
+        }
+
+    def cancel(self):
+        if not self.active:
+            return
+        if self.status == "running":
+            # Shards rodando param no próximo jogo; os que nem começaram são descartados
+            _job_cancel[self.slot] = 1
+            for future in self.futures:
+                future.cancel()
+        else:
+            self.task.cancel()
+        self.status = "cancelled"
+
+
+JOBS = {}
+_free_slots = list(range(JOB_QUEUE_DEPTH))
+_job_runners = None
+
+
+def job_runners():
+    # Semáforo criado dentro do loop do servidor
+    global _job_runners
+    if _job_runners is None:
+        _job_runners = asyncio.Semaphore(JOB_CONCURRENCY)
+    return _job_runners
+
+
+async def run_job(job):
+    req = job.req
+    try:
+        async with job_runners():
+            job.status = "running"
+            executor = get_executor()
+            trace_dir = request_trace_dir(req)
+            _job_cancel[job.slot] = 0
+            _job_progress[job.slot] = 0
+
+            # Futures do próprio pool (e não do asyncio): cancelar um shard
+            # que já está rodando não o abandona, então o slot só é liberado
+            # quando todos os processos pararam de usá-lo
+            job.futures = [
+                executor.submit(run_job_shard, job.slot, req.size, req.n_pits, req.max_steps,
+                                as_seed_sequence(req.seed), start, stop, req.vectorized, job.corpus, trace_dir,
+                                req.profile, req.exact_pits)
+                for start, stop in plan_shards(req.num_simulations)
+            ]
+            partials = await asyncio.gather(*map(asyncio.wrap_future, job.futures), return_exceptions=True)
+            job.games_done = _job_progress[job.slot]
+
+            if job.status == "running":
+                errors = [p for p in partials if isinstance(p, BaseException)]
+                if errors:
+                    job.status, job.error = "failed", repr(errors[0])
+                else:
+                    job.result, job.status = merge_results(partials), "done"
+                    if trace_dir:
+                        job.result["trace_dir"] = trace_dir
+                    RESULT_CACHE.put(cache_key("summary", req, job.corpus), job.result)
+    except asyncio.CancelledError:
+        job.status = "cancelled"  # cancelado ainda na fila
+    finally:
+        _free_slots.append(job.slot)
+        forget_old_jobs()
+
+
+def forget_old_jobs():
+    finished = [job_id for job_id, job in JOBS.items() if not job.active]
+    for job_id in finished[:max(0, len(finished) - JOB_HISTORY)]:
+        del JOBS[job_id]
+
+
+def get_job(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job não encontrado: {job_id}")
+    return job
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(req: SimulationRequest):
+    # Enfileira a simulação e responde na hora com o id do job. Com a fila
+    # cheia o pedido é recusado (429) para o cliente tentar mais tarde.
+    corpus = request_corpus(req)
+    cached = RESULT_CACHE.get(cache_key("summary", req, corpus))
+    if cached is not None:
+        # Já calculado: o job nasce pronto, sem slot e sem processo
+        job = SimulationJob(req, corpus, None)
+        job.status, job.result, job.games_done = "done", cached, req.num_simulations
+        JOBS[job.id] = job
+        forget_old_jobs()
+        return job.describe()
+
+    if not _free_slots:
+        raise HTTPException(status_code=429, detail="Fila de simulações cheia", headers={"Retry-After": "5"})
+
+    job = SimulationJob(req, corpus, _free_slots.pop())
+    JOBS[job.id] = job
+    job.task = asyncio.create_task(run_job(job))
+    return job.describe()
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    return get_job(job_id).describe()
+
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    job = get_job(job_id)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Job {job.status}, sem resultado")
+    return job.result
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = get_job(job_id)
+    job.cancel()
+    return job.describe()
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from besyan_agent import BayesianAgent, motion_operator, predict_wumpus
+
+
+def loop_predict(P):
+    # Referência: o laço célula a célula do BayesianAgent.predict original
+    size = P.shape[0]
+    new_P = np.zeros_like(P)
+    for x in range(size):
+        for y in range(size):
+            prob = P[x, y]
+            if prob == 0:
+                continue
+            new_P[x, y] += 0.5 * prob
+            neighbors = []
+            if x > 0: neighbors.append((x-1, y))
+            if x < size-1: neighbors.append((x+1, y))
+            if y > 0: neighbors.append((x, y-1))
+            if y < size-1: neighbors.append((x, y+1))
+            if neighbors:
+                prob_move = (0.5 * prob) / len(neighbors)
+                for nx, ny in neighbors:
+                    new_P[nx, ny] += prob_move
+            else:
+                new_P[x, y] += 0.5 * prob
+    return new_P
+
+
+def random_belief(rng, size):
+    # Crença normalizada com parte das células zeradas (como após um fedor)
+    P = rng.random((size, size))
+    P[rng.random((size, size)) < 0.3] = 0.0
+    return P / P.sum() if P.sum() > 0 else P
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 4, 5, 8, 10, 17, 20, 33])
+def test_predict_matches_loop(size):
+    rng = np.random.default_rng(size)
+    for _ in range(5):
+        P = random_belief(rng, size)
+        assert np.array_equal(predict_wumpus(P, motion_operator(size)), loop_predict(P))
+
+
+@pytest.mark.parametrize("size", [4, 12])
+def test_agent_predict_matches_loop_over_steps(size):
+    # Vários passos seguidos: os erros de arredondamento não podem se acumular
+    agent = BayesianAgent(size)
+    expected = agent.P_wumpus.copy()
+    for _ in range(20):
+        agent.predict()
+        expected = loop_predict(expected)
+        assert np.array_equal(agent.P_wumpus, expected)
+
+
+def test_batched_predict_matches_loop():
+    rng = np.random.default_rng(0)
+    batch = np.stack([random_belief(rng, 7) for _ in range(6)])
+    predicted = predict_wumpus(batch, motion_operator(7))
+    for P, result in zip(batch, predicted):
+        assert np.array_equal(result, loop_predict(P))
@@ -1,50 +1,61 @@
+import json
+import time
 import requests
 from besyan_agent import BayesianAgent
-from wumpus_environment import WumpusEnvironment, get_sprite
+from wumpus_environment import WumpusEnvironment, sprite_atlas, SPRITE_SIZE
+from game_trace import GameTrace, TraceRecorder, TraceReplay
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
 import streamlit as st
 import numpy as np
 
-SPRITE_LIB = {
-    'hero': get_sprite('hero'),
-    'wumpus': get_sprite('wumpus'),
-    'gold': get_sprite('gold'),
-    'pit': get_sprite('pit')
-}
+# Atlas de sprites (montado uma vez por processo em wumpus_environment)
+SPRITE_LIB = sprite_atlas()
 
 
 
 
-def run_game_streamlit(size, n_pits, max_steps, num_simulations):
+def run_game_streamlit(size, n_pits, max_steps, num_simulations, seed=None, profile=False, exact_pits=False,
+                       frame_skip=1, fps=20, jump_to_end=False):
+    # seed: None sorteia mundos novos; com seed o experimento se repete
+    # (e a API devolve do cache os pedidos já feitos).
+    # profile: mostra quanto tempo o agente gastou em cada fase.
+    # exact_pits: agente com o posterior exato dos buracos na fronteira.
+    # frame_skip / fps / jump_to_end: como a simulação única é desenhada
     if num_simulations == 1:
         # Executa uma única simulação
         st.write("Executando uma única simulação...")
-        run_single_simulation(size, n_pits, max_steps)
+        run_single_simulation(size, n_pits, max_steps, seed, profile, exact_pits, frame_skip, fps, jump_to_end)
     else:
         # Executa múltiplas simulações
         st.write(f"Executando {num_simulations} simulações...")
-        run_multiple_simulations(size, n_pits, max_steps, num_simulations)
+        run_multiple_simulations(size, n_pits, max_steps, num_simulations, seed, profile, exact_pits)
         
 
 
-def run_single_simulation(size, n_pits, max_steps):
+def play_single_game(size, n_pits, max_steps, seed=None, profile=False, exact_pits=False, on_step=None,
+                     belief_every=1):
+    # Roda o jogo inteiro sem desenhar nada, gravando o trace (com as
+    # crenças a cada belief_every passos; 0 = sem crenças) que depois é
+    # desenhado. on_step(step) é chamado a cada passo (barra de progresso).
+    # Devolve (env, agent, trace, step, done, stuck).
+
     # Cria um novo ambiente com o tamanho e número de poços definidos
-    env = WumpusEnvironment(size=size, n_pits=n_pits)
+    env = WumpusEnvironment(size=size, n_pits=n_pits, seed=seed, compact_percepts=True)
 
     # Cria o agente Bayesiano
-    agent = BayesianAgent(size=size)
+    agent = BayesianAgent(size=size, profile=profile, exact_pits=exact_pits)
 
     # Ambiente gera a primeira percepção (brisa, fedor, brilho etc.)
     obs = env.get_observation()
 
     # Agente atualiza suas probabilidades internas com essa percepção inicial
     agent.update(obs, env.agent_pos)
+    recorder = TraceRecorder(env, agent, belief_every=belief_every)
 
-    step = 0      # contador de passos
-    done = False  # indica se o jogo terminou
-
-    # Espaço reservado no Streamlit para atualizar os gráficos a cada step
-    plot_placeholder = st.empty()
+    step = 0       # contador de passos
+    done = False   # indica se o jogo terminou
+    stuck = False  # agente ficou sem plano
 
     # Loop principal da simulação → roda até atingir o limite de passos
     while step < max_steps:
@@ -54,66 +65,233 @@ def run_single_simulation(size, n_pits, max_steps):
 
         # Se o agente retornar None → ele está sem plano e ficou travado
         if action is None:
-            st.write(f"Agente travou no passo {step}!")
-
-            # Exibe o mundo e o estado do agente na tela
-            with plot_placeholder.container():
-                fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 7))
-                visualize_game(env, agent, step, ax1, ax2)
-                st.pyplot(fig)
-                plt.close(fig)
-
-            break  # encerra o jogo
+            stuck = True
+            break
 
         # Ambiente processa a ação: move o agente e retorna a nova percepção
-        obs, done, score = env.step(action)
+        obs, done, _ = env.step(action)
         step += 1  # incrementa o passo
 
         # Agente atualiza suas crenças com base na nova percepção e posição atual
         agent.update(obs, env.agent_pos)
-
-        # Atualiza visualização gráfica no Streamlit
-        with plot_placeholder.container():
-            fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 7))
-            visualize_game(env, agent, step, ax1, ax2)
-            st.pyplot(fig)
-            plt.close(fig)
+        recorder.record(action, obs)
+        if on_step is not None:
+            on_step(step)
 
         # Se o jogo terminou (ouro, wumpus, poço)
         if done:
-            display_game_outcome(done, env, step) 
             break
 
-    # Se o loop terminou sem "done = True", o agente não chegou ao objetivo
-    if not done:
-         display_game_outcome(done, env, step)
+    return env, agent, recorder.finish(env.message), step, done, stuck
+
+
+def run_single_simulation(size, n_pits, max_steps, seed=None, profile=False, exact_pits=False,
+                          frame_skip=1, fps=20, jump_to_end=False):
+    # O jogo é calculado primeiro (sem esperar o desenho) e depois desenhado
+    # a partir do trace: um quadro a cada frame_skip passos, no máximo fps
+    # quadros por segundo, ou só o último com jump_to_end
+    progress = st.progress(0.0, text="Simulando...")
+
+    def on_step(step):
+        if step % 10 == 0:
+            progress.progress(min(step / max_steps, 1.0), text=f"Simulando... passo {step}")
+
+    env, agent, trace, step, done, stuck = play_single_game(size, n_pits, max_steps, seed, profile, exact_pits,
+                                                            on_step)
+    progress.empty()
+    st.session_state.trace = trace
+
+    # Espaço reservado para a animação; o resultado já aparece embaixo
+    # enquanto os quadros são desenhados
+    plot_placeholder = st.empty()
+    if stuck:
+        st.write(f"Agente travou no passo {step}!")
+    display_game_outcome(done, env, step)
+    display_results_single(step, agent.nodes_expanded, env.score)
+    if profile:
+        display_profile(agent.profiler.as_dict())
+
+    first = trace.num_steps if jump_to_end else 0
+    play_trace(trace, plot_placeholder, first, frame_skip=frame_skip, fps=fps)
+
+
+def play_trace(trace, placeholder, start=0, stop=None, frame_skip=1, fps=20):
+    # Desenha os passos start, start + frame_skip, ... até stop (o último do
+    # jogo por padrão, sempre incluído) na mesma figura, sem passar de fps
+    # quadros por segundo
+    stop = trace.num_steps if stop is None else stop
+    replay = TraceReplay(trace).seek(start)
+    view = LiveView(replay, replay)
+    frames = list(range(start, stop + 1, max(1, frame_skip)))
+    if frames[-1] != stop:
+        frames.append(stop)
+
+    deadline = time.perf_counter()
+    for t in frames:
+        replay.seek(t)
+        view.update(replay, replay, t)
+        placeholder.image(view.frame(), output_format="JPEG")
+        deadline += 1 / fps
+        delay = deadline - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            # Desenho mais lento que o fps: não acumula atraso
+            deadline = time.perf_counter()
+    view.close()
+
+
+def replay_trace_streamlit(trace):
+    # Reproduz um trace gravado: escolhe o passo (vai e volta à vontade) ou
+    # toca a partir dele na velocidade escolhida; nada é recalculado
+    st.write(f"## ⏯️ Replay ({trace.num_steps} passos — {trace.outcome or 'sem resultado'})")
+    col1, col2 = st.columns(2)
+    with col1:
+        start = st.slider("Passo", 0, trace.num_steps, trace.num_steps, key=f"replay_step_{trace.num_steps}_{trace.score}")
+    with col2:
+        speed = st.slider("Velocidade (passos/s)", 1, 60, 10, key="replay_speed")
+    play = st.button("▶ Reproduzir a partir deste passo")
+
+    placeholder = st.empty()
+    if play:
+        play_trace(trace, placeholder, start, fps=speed)
+    else:
+        play_trace(trace, placeholder, start, stop=start)
 
-    
-    display_results_single(step, agent.nodes_expanded,score)
-    
 
-def call_api(size, n_pits, max_steps, num_simulations):
+def load_trace_streamlit():
+    # Trace do último jogo desta sessão ou um .npz salvo pela API (trace_lost)
+    uploaded = st.file_uploader("Abrir trace (.npz)", type="npz")
+    if uploaded is not None:
+        return GameTrace.load(uploaded)
+    return st.session_state.get("trace")
+
+
+API_URL = "http://localhost:8000"
+
+
+def stream_api(size, n_pits, max_steps, num_simulations, seed=None, profile=False, exact_pits=False):
+    # Lê o /simulate/stream linha a linha (NDJSON): um registro por jogo
+    # terminado e, no fim, {"summary": {...}}
     payload = {
         "size": size,
         "n_pits": n_pits,
         "max_steps": max_steps,
         "num_simulations": num_simulations,
-        
+        "seed": seed,
+        "profile": profile,
+        "exact_pits": exact_pits,
     }
 
-    response = requests.post("http://localhost:8000/simulate", json=payload,timeout=300)
-    st.write(response)
-    return response.json()
-
-def run_multiple_simulations(size, n_pits, max_steps, num_simulations):
-
-    with st.spinner("Executando simulações..."):
-        results = call_api(size, n_pits, max_steps, num_simulations)
+    with requests.post(f"{API_URL}/simulate/stream", json=payload, stream=True, timeout=300) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+
+def run_multiple_simulations(size, n_pits, max_steps, num_simulations, seed=None, profile=False, exact_pits=False):
+    # Progresso e taxa de vitória atualizados a cada jogo que termina
+    progress = st.progress(0.0, text="Executando simulações...")
+    live = st.empty()
+    finished = victories = 0
+    results = None
+
+    for record in stream_api(size, n_pits, max_steps, num_simulations, seed, profile, exact_pits):
+        if "summary" in record:
+            results = record["summary"]
+            break
+        finished += 1
+        victories += record["outcome"] == "victory"
+        progress.progress(finished / num_simulations, text=f"{finished}/{num_simulations} jogos")
+        live.metric("Taxa de vitória parcial", f"{100 * victories / finished:.1f}%")
 
+    progress.empty()
+    live.empty()
     st.success("Simulações concluídas!")
     display_results(results)
+    if "profile" in results:
+        display_profile(results["profile"])
     return results
 
+# Métricas da varredura: (chave na resposta do /sweep, título, mapa de cores, formato)
+SWEEP_METRICS = (
+    ("win_rate", "Taxa de vitória", "RdYlGn", "{:.0%}"),
+    ("average_score", "Score médio", "viridis", "{:.0f}"),
+    ("average_steps", "Passos médios", "Blues", "{:.1f}"),
+)
+SWEEP_REDRAW_S = 1.0  # intervalo mínimo entre redesenhos do heatmap parcial
+
+
+def stream_sweep(sizes, pits, max_steps, num_simulations, seed=None, exact_pits=False):
+    # Lê o /sweep linha a linha (NDJSON): um ponto (size, n_pits) por linha,
+    # na ordem em que ficam prontos, e no fim {"sweep": {...}} com as matrizes
+    payload = {
+        "sizes": list(sizes),
+        "n_pits": list(pits),
+        "max_steps": max_steps,
+        "num_simulations": num_simulations,
+        "seed": seed,
+        "exact_pits": exact_pits,
+    }
+
+    with requests.post(f"{API_URL}/sweep", json=payload, stream=True, timeout=3600) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+
+def sweep_heatmap(sizes, pits, matrix, title, cmap, fmt):
+    # Linhas = tamanho do tabuleiro, colunas = número de buracos; células sem
+    # resultado (ainda rodando ou buracos demais) ficam em branco
+    data = np.array([[np.nan if value is None else value for value in row] for row in matrix], dtype=float)
+    fig, ax = plt.subplots(figsize=(1 + 0.7 * len(pits), 1 + 0.5 * len(sizes)))
+    image = ax.imshow(data, cmap=cmap, origin='lower', aspect='auto')
+    ax.set_xticks(range(len(pits)), pits)
+    ax.set_yticks(range(len(sizes)), sizes)
+    ax.set_xlabel("Número de buracos")
+    ax.set_ylabel("Tamanho do tabuleiro")
+    ax.set_title(title)
+    for (row, col), value in np.ndenumerate(data):
+        if not np.isnan(value):
+            ax.text(col, row, fmt.format(value), ha='center', va='center', fontsize=8)
+    fig.colorbar(image, ax=ax)
+    fig.tight_layout()
+    return fig
+
+def run_sweep_streamlit(sizes, pits, max_steps, num_simulations, seed=None, exact_pits=False):
+    # Varredura size × n_pits pela API: o heatmap da taxa de vitória vai se
+    # preenchendo conforme os pontos terminam (os mais baratos primeiro)
+    sizes, pits = sorted(set(sizes)), sorted(set(pits))
+    total = sum(n <= size * size - 3 for size in sizes for n in pits)
+    st.write(f"Varredura de {total} pontos ({num_simulations} jogos cada)...")
+    progress = st.progress(0.0, text="Executando varredura...")
+    live = st.empty()
+    win_rate = [[None] * len(pits) for _ in sizes]
+    finished, last_draw, grid = 0, 0.0, None
+
+    for record in stream_sweep(sizes, pits, max_steps, num_simulations, seed, exact_pits):
+        if "sweep" in record:
+            grid = record["sweep"]
+            break
+        finished += 1
+        win_rate[sizes.index(record["size"])][pits.index(record["n_pits"])] = record["win_rate"]
+        progress.progress(finished / total, text=f"{finished}/{total} pontos")
+        if time.perf_counter() - last_draw >= SWEEP_REDRAW_S:
+            fig = sweep_heatmap(sizes, pits, win_rate, "Taxa de vitória (parcial)", "RdYlGn", "{:.0%}")
+            live.pyplot(fig)
+            plt.close(fig)
+            last_draw = time.perf_counter()
+
+    progress.empty()
+    live.empty()
+    st.success("Varredura concluída!")
+    for tab, (key, title, cmap, fmt) in zip(st.tabs([title for _, title, _, _ in SWEEP_METRICS]), SWEEP_METRICS):
+        with tab:
+            fig = sweep_heatmap(grid["sizes"], grid["n_pits"], grid[key], title, cmap, fmt)
+            st.pyplot(fig)
+            plt.close(fig)
+    return grid
+
 def display_results(results):
     st.write("## 📊 Resultados das Simulações")
 
@@ -253,6 +431,29 @@ def display_results_single(step_count, nodes_expanded, score):
 
     st.success("✔ Simulação concluída!")
 
+def display_profile(profile):
+    # Tabela do PhaseProfiler: tempo total, chamadas e fatia de cada fase
+    st.write("### ⏱️ Tempo por Fase do Agente")
+    phases = profile["phases"]
+    total = sum(stats["seconds"] for stats in phases.values()) or 1.0
+    rows = [
+        {
+            "Fase": phase,
+            "Total (ms)": round(stats["seconds"] * 1e3, 2),
+            "Chamadas": stats["calls"],
+            "Média (µs)": round(stats["seconds"] / max(stats["calls"], 1) * 1e6, 1),
+            "% do tempo": round(100 * stats["seconds"] / total, 1),
+        }
+        for phase, stats in sorted(phases.items(), key=lambda item: -item[1]["seconds"])
+    ]
+    st.dataframe(rows, use_container_width=True)
+
+    counters = profile["counters"]
+    if counters:
+        columns = st.columns(len(counters))
+        for column, (name, n) in zip(columns, sorted(counters.items())):
+            column.metric(name, n)
+
 def display_game_outcome(done, env, step):
     if done:
         # --- VITÓRIA ---
@@ -311,81 +512,124 @@ def display_game_outcome(done, env, step):
         </div>
         """, unsafe_allow_html=True)
 
-def visualize_game(env, agent, step_num, ax1, ax2):
-    # --- PLOT 1: TABULEIRO COM SPRITES ---
-
-    #TAMANHO DAS SPRITES
-    P_SIZE = 8
-    board_img = np.zeros((env.size * P_SIZE, env.size * P_SIZE, 3), dtype=int)
-
-    for i in range(env.size):
-        for j in range(env.size):
-            tile = env.floor_map[i][j]
-            board_img[i*P_SIZE:(i+1)*P_SIZE, j*P_SIZE:(j+1)*P_SIZE] = tile
-
-            sprite = None
-            if (i, j) == env.agent_pos:
-                sprite = SPRITE_LIB['hero']
-            elif (i, j) == env.wumpus_pos:
-                sprite = SPRITE_LIB['wumpus']
-            elif (i, j) == env.gold_pos:
-                sprite = SPRITE_LIB['gold']
-            elif (i, j) in env.pits_pos:
-                is_pit = False
-                for p in env.pits_pos:
-                    if p == (i,j): is_pit = True
-                if is_pit: sprite = SPRITE_LIB['pit']
-
-            if sprite is not None:
-                for r in range(P_SIZE):
-                    for c in range(P_SIZE):
-                        alpha = sprite[r,c,3]
-                        if alpha > 0:
-                            rgb = sprite[r,c,:3] * 255
-                            board_img[i*P_SIZE+r, j*P_SIZE+c] = rgb
-
-    ax1.imshow(board_img)
-    ax1.axis('off')
-    ax1.set_title(f"Mundo Real - Passo {step_num}\n{env.message}", fontsize=12, fontweight='bold')
-
-    # --- PLOT 1: HEATMAP COM PERECEPÇÃO DE PERIGO/RECOMPENSA/HISTORICO DO AGENTE ---
-    # INICIALIZAÇÃO DO HEATMAP DE PERIGO
-    combined_danger = np.maximum(agent.P_wumpus, agent.P_pit)
-    heatmap = ax2.imshow(combined_danger, cmap='Reds', interpolation='nearest', vmin=0, vmax=1)
-
-    gold_map = agent.P_gold
-
-    # PROCURA A POSIÇÃO PROVÁVEL DO OURO COM BASE NAS PERCEPÇÕES DO AGENTE
-    gold_y, gold_x = np.unravel_index(np.argmax(gold_map), gold_map.shape)
-
-    # PLOTA O O OURO PROVÁVEL POR CIMA DO HEATMAP DE PERIGO
-    ax2.plot(
-        gold_x, gold_y,
-        marker='*', markersize=20, color='yellow',
-        markeredgecolor='black', markeredgewidth=1.5,
-        label="Ouro provável"
-    )
-
-    # DESENHA NO HEATMAP O HISTÓRICO DE PASSOS DO AGENTE
-    if len(agent.history) > 1:
-        for i in range(len(agent.history) - 1):
-            start = agent.history[i]
-            end = agent.history[i+1]
-            x_start, y_start = start[1], start[0]
-            x_end, y_end = end[1], end[0]
-            dx, dy = x_end - x_start, y_end - y_start
-            ax2.arrow(x_start, y_start, dx*0.8, dy*0.8, head_width=0.3, color='blue', alpha=0.5)
-
-    ax2.plot(env.agent_pos[1], env.agent_pos[0], 'bo', markersize=10, label="Agente")
-
-    if agent.current_path:
-        path_y = [p[0] for p in agent.current_path]
-        path_x = [p[1] for p in agent.current_path]
-        path_y.insert(0, env.agent_pos[0])
-        path_x.insert(0, env.agent_pos[1])
-        ax2.plot(path_x, path_y, 'g-', linewidth=2, label="Plano")
-
-    ax2.grid(color='gray', linewidth=0.5)
-    ax2.set_title("Visão do Agente", fontsize=12)
-
-    plt.tight_layout()
\ No newline at end of file
+class BoardRenderer:
+    # Desenha o tabuleiro em pixels. O chão com os buracos (que não mudam
+    # durante o jogo) fica numa camada estática, montada uma vez por
+    # tabuleiro; a cada quadro só as células do agente, do Wumpus e do ouro
+    # (e as que eles ocupavam no quadro anterior) são redesenhadas.
+    PRIORITY = ('hero', 'wumpus', 'gold')  # quem aparece quando dividem a célula
+
+    def __init__(self, tile=SPRITE_SIZE):
+        self.tile = tile
+        self.floor = None
+        # Pixels RGB já convertidos (com o mesmo truncamento do int) e a
+        # máscara dos pixels opacos de cada sprite
+        self.rgb = {name: (SPRITE_LIB[name][..., :3] * 255).astype(np.uint8) for name in self.PRIORITY + ('pit',)}
+        self.mask = {name: SPRITE_LIB[name][..., 3] > 0 for name in self.rgb}
+
+    def cell(self, image, pos):
+        i, j = pos
+        t = self.tile
+        return image[i*t:(i+1)*t, j*t:(j+1)*t]
+
+    def paint(self, image, pos, name):
+        tile = self.cell(image, pos)
+        tile[self.mask[name]] = self.rgb[name][self.mask[name]]
+
+    def build_static(self, env):
+        # Chão (size, size, 8, 8, 3) -> imagem (size*8, size*8, 3) + buracos
+        s, t = env.size, self.tile
+        self.floor = env.floor_map
+        self.static = self.floor.transpose(0, 2, 1, 3, 4).reshape(s * t, s * t, 3).astype(np.uint8)
+        for pos in env.pits_pos:
+            self.paint(self.static, pos, 'pit')
+        self.image = self.static.copy()
+        self.drawn = set()
+
+    def render(self, env):
+        # floor_map muda a cada reset do ambiente (e só então os buracos mudam)
+        if env.floor_map is not self.floor:
+            self.build_static(env)
+
+        sprites = {}
+        for name, pos in zip(self.PRIORITY, (env.agent_pos, env.wumpus_pos, env.gold_pos)):
+            sprites.setdefault(tuple(pos), name)
+
+        # Restaura o que mudou e pinta os sprites móveis por cima
+        for pos in self.drawn | sprites.keys():
+            self.cell(self.image, pos)[:] = self.cell(self.static, pos)
+        for pos, name in sprites.items():
+            self.paint(self.image, pos, name)
+        self.drawn = set(sprites)
+        return self.image
+
+
+class LiveView:
+    # Visualização ao vivo de um jogo: a figura e todos os artistas são
+    # criados uma única vez e, a cada passo, só os dados são trocados
+    # (set_data / set_segments). Assim o custo do quadro não cresce com o
+    # tamanho do histórico.
+    def __init__(self, env, agent):
+        self.board = BoardRenderer()
+        self.fig, (self.ax1, self.ax2) = plt.subplots(1, 2, figsize=(14, 7))
+
+        # --- PLOT 1: TABULEIRO COM SPRITES ---
+        self.board_img = self.ax1.imshow(self.board.render(env))
+        self.ax1.axis('off')
+
+        # --- PLOT 2: HEATMAP COM PERECEPÇÃO DE PERIGO/RECOMPENSA/HISTORICO DO AGENTE ---
+        self.heatmap = self.ax2.imshow(np.maximum(agent.P_wumpus, agent.P_pit), cmap='Reds', interpolation='nearest', vmin=0, vmax=1)
+
+        # OURO PROVÁVEL POR CIMA DO HEATMAP DE PERIGO
+        self.gold_marker, = self.ax2.plot(
+            [], [],
+            marker='*', markersize=20, color='yellow',
+            markeredgecolor='black', markeredgewidth=1.5, linestyle='none',
+            label="Ouro provável"
+        )
+
+        # HISTÓRICO DE PASSOS: uma única coleção de segmentos, estendida a cada passo
+        self.history_segments = []
+        self.history = LineCollection([], colors='blue', alpha=0.5, linewidths=2)
+        self.ax2.add_collection(self.history)
+
+        self.agent_marker, = self.ax2.plot([], [], 'bo', markersize=10, label="Agente")
+        self.plan_line, = self.ax2.plot([], [], 'g-', linewidth=2, label="Plano")
+
+        self.ax2.grid(color='gray', linewidth=0.5)
+        self.ax2.set_title("Visão do Agente", fontsize=12)
+
+        self.update(env, agent, 0)
+        self.fig.tight_layout()
+
+    def update(self, env, agent, step_num):
+        self.board_img.set_data(self.board.render(env))
+        self.ax1.set_title(f"Mundo Real - Passo {step_num}\n{env.message}", fontsize=12, fontweight='bold')
+
+        self.heatmap.set_data(np.maximum(agent.P_wumpus, agent.P_pit))
+
+        # PROCURA A POSIÇÃO PROVÁVEL DO OURO COM BASE NAS PERCEPÇÕES DO AGENTE
+        gold_y, gold_x = np.unravel_index(np.argmax(agent.P_gold), agent.P_gold.shape)
+        self.gold_marker.set_data([gold_x], [gold_y])
+
+        # Só os passos novos do histórico viram segmentos (80% do passo, como as setas antigas);
+        # ao voltar no tempo (replay) os segmentos a mais são descartados
+        del self.history_segments[max(0, len(agent.history) - 1):]
+        for i in range(len(self.history_segments), len(agent.history) - 1):
+            (y0, x0), (y1, x1) = agent.history[i], agent.history[i + 1]
+            self.history_segments.append([(x0, y0), (x0 + 0.8 * (x1 - x0), y0 + 0.8 * (y1 - y0))])
+        self.history.set_segments(self.history_segments)
+
+        self.agent_marker.set_data([env.agent_pos[1]], [env.agent_pos[0]])
+
+        path = [env.agent_pos] + list(agent.current_path) if agent.current_path else []
+        self.plan_line.set_data([p[1] for p in path], [p[0] for p in path])
+
+    def frame(self):
+        # Quadro atual como array RGB (uint8). Bem mais barato que o
+        # st.pyplot, que salva um PNG em alta resolução a cada chamada
+        self.fig.canvas.draw()
+        return np.asarray(self.fig.canvas.buffer_rgba())[..., :3].copy()
+
+    def close(self):
+        plt.close(self.fig)
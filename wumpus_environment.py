@@ -1,7 +1,8 @@
+from functools import lru_cache
+
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import colors
-import random
 import time
 from IPython.display import clear_output
 import heapq
@@ -15,68 +16,110 @@ WUMPUS = 2
 OURO = 3
 BURACO = 4
 
+STENCH_RADIUS = 2  # fedor: distância de Manhattan até o Wumpus
+
+# Quantos tamanhos de tabuleiro diferentes ficam em cache ao mesmo tempo.
+# A API atende tamanhos variados, então os caches são LRU e limitados.
+BOARD_CACHE_SIZE = 32
+
+# Percepções compactas: um inteiro por passo (um uint8 por jogo no lote) no
+# lugar da lista de strings. Bit 0 = brilho, bit 1 = fedor e os bits de cima
+# guardam quantas brisas (uma por buraco vizinho).
+GLITTER_BIT = 1
+STENCH_BIT = 2
+BREEZE_SHIFT = 2
+
+
 # --- PARTE 1: O AMBIENTE (FÍSICA) ---
 class WumpusEnvironment:
-    def __init__(self, size=10, n_pits=15):
+    def __init__(self, size=10, n_pits=15, seed=None, board=None, compact_percepts=False):
         self.size = size
+        # compact_percepts: get_observation/step devolvem o código inteiro
+        # (percept_code) em vez da lista de strings
+        self.compact_percepts = compact_percepts
         self.score = 0
         self.n_pits = n_pits
-        self.reset()
+        # Gerador próprio do jogo: com a mesma seed o tabuleiro e os
+        # movimentos do Wumpus se repetem (ver game_seed)
+        self.rng = np.random.default_rng(seed)
+        self.reset(board)
 
     def update_score(self, score):
         self.score = score
 
-    def reset(self):
-        self.grid = np.zeros((self.size, self.size))
+    def reset(self, board=None):
+        # board: tabuleiro pronto (ex.: do corpus de cenários, ver
+        # scenario_corpus.py) no formato de sample_board; None sorteia um novo
         self.game_over = False
         self.won = False
         self.message = ""
         self.step_count = 0
 
-        coords = [(x, y) for x in range(self.size) for y in range(self.size)]
-
         self.agent_pos = (0, 0)
-        if self.agent_pos in coords: coords.remove(self.agent_pos)
 
         # Aleatoriedade
-        n_items = 2 + self.n_pits
-        indices = np.random.choice(len(coords), n_items, replace=False)
-        chosen_coords = [coords[i] for i in indices]
+        if board is None:
+            board = sample_board(self.rng, self.size, self.n_pits)
+        chosen_coords = [(int(x), int(y)) for x, y in board]
 
         self.wumpus_pos = chosen_coords[0]
         self.gold_pos = chosen_coords[1]
         self.pits_pos = chosen_coords[2:]
 
-        # Gera o chão (textura estática)
-        self.floor_map = [[get_sprite('floor') for _ in range(self.size)] for _ in range(self.size)]
+        # Campos fixos do tabuleiro: onde há buraco e quantas brisas cada
+        # célula sente (buracos vizinhos). Percepção e morte viram consultas
+        # O(1) em vez de percorrer a lista de buracos a cada passo.
+        board = np.asarray(board)
+        self.pit_map = np.zeros((self.size, self.size), dtype=bool)
+        self.pit_map[board[2:, 0], board[2:, 1]] = True
+        self.breeze_map = count_adjacent(self.pit_map)
+
+        # A textura do chão só é gerada quando o tabuleiro for desenhado
+        # (ver floor_map); as simulações em lote nunca pagam por ela
+        self._floor_map = None
 
         return self.get_observation()
 
+    @property
+    def wumpus_pos(self):
+        return self._wumpus_pos
+
+    @wumpus_pos.setter
+    def wumpus_pos(self, pos):
+        # A máscara de fedor acompanha o Wumpus: é uma fatia (view) do
+        # diamante em cache, sem nada para recalcular
+        self._wumpus_pos = pos
+        self.stench_map = kernel_window(stench_kernel(self.size), self.size, pos)
+
+    @property
+    def floor_map(self):
+        # Gera o chão (textura estática) no primeiro acesso após o reset
+        if self._floor_map is None:
+            self._floor_map = floor_tiles(self.size)
+        return self._floor_map
+
     def get_observation(self):
-        percepts = []
+        code = self.percept_code()
+        return code if self.compact_percepts else decode_percepts(code)
+
+    def percept_code(self):
         ax, ay = self.agent_pos
 
          # Brilho: agora o agente percebe quando está no ouro ou adjacente
         gx, gy = self.gold_pos
-        if abs(ax - gx) + abs(ay - gy) <= 1:    #  adiciona "brilho" nas casas adjacentes ao ouro
-            percepts.append("Brilho")
-        
-
-        for px, py in self.pits_pos:
-            if abs(ax - px) + abs(ay - py) == 1:
-                percepts.append("Brisa")
+        code = GLITTER_BIT if abs(ax - gx) + abs(ay - gy) <= 1 else 0
 
-        wx, wy = self.wumpus_pos
-        if abs(ax - wx) + abs(ay - wy) <= 2: percepts.append("Fedor")
+        if self.stench_map[ax, ay]: code |= STENCH_BIT
 
-        return percepts
+        # Uma brisa por buraco vizinho
+        return code | int(self.breeze_map[ax, ay]) << BREEZE_SHIFT
 
     def is_valid_pos(self, pos):
         x, y = pos
         return 0 <= x < self.size and 0 <= y < self.size
 
     def move_wumpus(self):
-        if random.random() < 0.5: return
+        if self.rng.random() < 0.5: return
 
         wx, wy = self.wumpus_pos
         moves = [(0,1), (0,-1), (1,0), (-1,0)]
@@ -84,12 +127,11 @@ class WumpusEnvironment:
 
         for dx, dy in moves:
             new_pos = (wx + dx, wy + dy)
-            is_pit = any(p == new_pos for p in self.pits_pos)
-            if self.is_valid_pos(new_pos) and not is_pit:
+            if self.is_valid_pos(new_pos) and not self.pit_map[new_pos]:
                 valid_moves.append(new_pos)
 
         if valid_moves:
-            self.wumpus_pos = random.choice(valid_moves)
+            self.wumpus_pos = valid_moves[int(self.rng.random() * len(valid_moves))]
 
     def step(self, action):
         if self.game_over:
@@ -110,7 +152,7 @@ class WumpusEnvironment:
         else:
             self.message = "Parede!"
 
-        if any(p == self.agent_pos for p in self.pits_pos):
+        if self.pit_map[self.agent_pos]:
             self.game_over = True
             self.message = "MORREU (Buraco)!"
             return self.get_observation(), True, self.score
@@ -133,84 +175,405 @@ class WumpusEnvironment:
 
         return self.get_observation(), False, self.score
     
+# --- SORTEIO DO TABULEIRO E SEEDS REPRODUTÍVEIS ---
+def sample_board(rng, size, n_pits):
+    # Sorteia Wumpus, ouro e buracos em células distintas, fora de (0,0).
+    # Devolve (2 + n_pits, 2): linha 0 = Wumpus, 1 = ouro, demais = buracos
+    flat = rng.choice(size * size - 1, 2 + n_pits, replace=False) + 1
+    return np.stack(np.divmod(flat, size), axis=1)
+
+
+def as_seed_sequence(seed):
+    # Aceita int, None (entropia nova) ou uma SeedSequence já criada
+    return seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+
+def game_seed(seed, index):
+    # Seed independente do jogo #index derivada da seed da requisição.
+    # Só depende de (seed, index), então o jogo k é o mesmo não importa
+    # quem o execute (ambiente simples, vetorizado ou outro processo).
+    root = as_seed_sequence(seed)
+    return np.random.SeedSequence(root.entropy, spawn_key=root.spawn_key + (index,))
+
+
+# --- MÁSCARAS DE DISTÂNCIA (BRILHO / FEDOR) ---
+# Cada tamanho de tabuleiro guarda um único "diamante" de raio r centrado numa
+# janela (2*size-1)². A máscara para uma posição (agente ou Wumpus) é só uma
+# fatia (view) dessa janela, então não há nada para recalcular por passo.
+# Usadas pelo ambiente (fedor) e pelo agente (ver besyan_agent).
+@lru_cache(maxsize=BOARD_CACHE_SIZE)
+def distance_kernel(size):
+    r = np.abs(np.arange(-(size - 1), size))
+    kernel = r[:, None] + r[None, :]
+    kernel.flags.writeable = False
+    return kernel
+
+
+@lru_cache(maxsize=BOARD_CACHE_SIZE)
+def radius_kernel(size, radius):
+    kernel = distance_kernel(size) <= radius
+    kernel.flags.writeable = False
+    return kernel
+
+
+def stench_kernel(size):
+    return radius_kernel(size, STENCH_RADIUS)
+
+
+def kernel_window(kernel, size, pos):
+    # Janela (size, size) do kernel centrada em pos (view, sem cópia)
+    ax, ay = pos
+    return kernel[size - 1 - ax:2 * size - 1 - ax, size - 1 - ay:2 * size - 1 - ay]
+
+
+def encode_percepts(percepts):
+    # Lista de strings → código; um código já pronto passa direto
+    if isinstance(percepts, (int, np.integer)):
+        return int(percepts)
+    return (GLITTER_BIT * ("Brilho" in percepts)
+            | STENCH_BIT * ("Fedor" in percepts)
+            | percepts.count("Brisa") << BREEZE_SHIFT)
+
+
+def decode_percepts(code):
+    # Visão em strings do código, na ordem histórica: Brilho, Brisa×n, Fedor
+    code = int(code)
+    return (["Brilho"] * (code & GLITTER_BIT)
+            + ["Brisa"] * (code >> BREEZE_SHIFT)
+            + ["Fedor"] * bool(code & STENCH_BIT))
+
+
+def pack_percepts(glitter, stench, breeze):
+    # Versão em lote: arrays (N,) de brilho, fedor e brisas → códigos uint8
+    return (glitter * GLITTER_BIT | stench * STENCH_BIT | breeze.astype(np.uint8) << BREEZE_SHIFT).astype(np.uint8)
+
+
+def unpack_percepts(codes):
+    # Códigos uint8 (N,) → (brilho, fedor, brisas), o formato de get_observation
+    codes = np.asarray(codes)
+    return (codes & GLITTER_BIT).astype(bool), (codes & STENCH_BIT).astype(bool), (codes >> BREEZE_SHIFT).astype(np.int8)
+
+
+def count_adjacent(grid):
+    # Quantos vizinhos (N, S, L, O) de cada célula estão marcados em `grid`.
+    # Funciona para um tabuleiro (size, size) ou um lote (N, size, size).
+    grid = grid.astype(np.int8)
+    counts = np.zeros_like(grid)
+    counts[..., 1:, :] += grid[..., :-1, :]
+    counts[..., :-1, :] += grid[..., 1:, :]
+    counts[..., :, 1:] += grid[..., :, :-1]
+    counts[..., :, :-1] += grid[..., :, 1:]
+    return counts
+
+
+# --- PARTE 2: AMBIENTE VETORIZADO (N JOGOS DE UMA VEZ) ---
+# Códigos de ação e resultado usados nos arrays do ambiente vetorizado
+ACTIONS = ('N', 'S', 'L', 'O')
+ACTION_CODES = {a: i for i, a in enumerate(ACTIONS)}
+STAY = 4         # ação desconhecida: gasta o passo sem sair do lugar
+NO_ACTION = -1   # o slot não joga nesta rodada (ex.: agente sem plano)
+ACTION_DELTAS = np.array([[-1, 0], [1, 0], [0, 1], [0, -1], [0, 0]])
+
+OUTCOME_RUNNING = 0
+OUTCOME_VICTORY = 1
+OUTCOME_WUMPUS = 2
+OUTCOME_PIT = 3
+OUTCOME_STUCK = 4
+
+# Mesma ordem de tentativa de WumpusEnvironment.move_wumpus
+WUMPUS_MOVES = np.array([(0, 1), (0, -1), (1, 0), (-1, 0)])
+
+
+class VectorizedWumpusEnvironment:
+    # Mantém N jogos independentes em arrays NumPy e avança todos com uma
+    # única chamada de step. O jogo #k usa game_seed(seed, k), então ele é
+    # idêntico a WumpusEnvironment(size, n_pits, seed=game_seed(seed, k))
+    # recebendo as mesmas ações.
+    #
+    # Quando um jogo termina o slot é reiniciado com o próximo jogo (até
+    # num_games); o resultado final fica guardado em results(). Com um corpus
+    # (boards) o jogo #k usa o tabuleiro boards[k] em vez de sortear.
+    UNIFORM_BLOCK = 64
+
+    def __init__(self, num_envs, size=10, n_pits=15, seed=None, num_games=None, first_game=0, boards=None,
+                 compact_percepts=False):
+        self.num_envs = num_envs
+        self.compact_percepts = compact_percepts  # observação como códigos uint8 (pack_percepts)
+        self.size = size
+        self.n_pits = n_pits
+        self.num_games = num_games
+        self.first_game = first_game  # índice do primeiro jogo (para dividir em shards)
+        self.boards = boards          # corpus opcional: o jogo #k usa boards[k]
+        self.seed = as_seed_sequence(seed)
+
+        n = num_envs
+        self.agent_pos = np.zeros((n, 2), dtype=np.int64)
+        self.wumpus_pos = np.zeros((n, 2), dtype=np.int64)
+        self.gold_pos = np.zeros((n, 2), dtype=np.int64)
+        self.pit_map = np.zeros((n, size, size), dtype=bool)
+        self.breeze_map = np.zeros((n, size, size), dtype=np.int8)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.step_count = np.zeros(n, dtype=np.int64)
+        self.game_index = np.full(n, -1, dtype=np.int64)
+        self.active = np.zeros(n, dtype=bool)
+
+        # Cada jogo consome números aleatórios do seu próprio gerador. Para não
+        # chamar o gerador N vezes por passo, os números são sorteados em
+        # blocos e consumidos com um cursor por slot.
+        self.rngs = [None] * n
+        self._uniforms = np.zeros((n, self.UNIFORM_BLOCK))
+        self._cursor = np.zeros(n, dtype=np.int64)
+
+        self._next_game = 0
+        self._finished = []
+        self.reset()
+
+    def reset(self):
+        self._next_game = self.first_game
+        self._finished = []
+        self._reported = 0
+        self.active[:] = False
+        self._start_games(np.arange(self.num_envs))
+        return self.get_observation()
+
+    def _start_games(self, slots):
+        for i in slots:
+            if self.num_games is not None and self._next_game >= self.first_game + self.num_games:
+                self.active[i] = False
+                continue
+            self._reset_slot(i, self._next_game)
+            self._next_game += 1
+
+    def _reset_slot(self, i, index):
+        rng = np.random.default_rng(game_seed(self.seed, index))
+        if self.boards is not None:
+            board = self.boards[index]
+        else:
+            board = sample_board(rng, self.size, self.n_pits)
+        xs, ys = board[:, 0], board[:, 1]
+
+        self.rngs[i] = rng
+        self.game_index[i] = index
+        self.active[i] = True
+        self.agent_pos[i] = (0, 0)
+        self.wumpus_pos[i] = (xs[0], ys[0])
+        self.gold_pos[i] = (xs[1], ys[1])
+        self.pit_map[i] = False
+        self.pit_map[i, xs[2:], ys[2:]] = True
+        self.breeze_map[i] = count_adjacent(self.pit_map[i])
+        self.score[i] = 0
+        self.step_count[i] = 0
+        self._uniforms[i] = rng.random(self.UNIFORM_BLOCK)
+        self._cursor[i] = 0
+
+    def _draw(self, slots):
+        # Próximo número uniforme [0, 1) do gerador de cada slot
+        empty = slots[self._cursor[slots] >= self.UNIFORM_BLOCK]
+        for i in empty:
+            self._uniforms[i] = self.rngs[i].random(self.UNIFORM_BLOCK)
+            self._cursor[i] = 0
+        values = self._uniforms[slots, self._cursor[slots]]
+        self._cursor[slots] += 1
+        return values
+
+    def get_observation(self):
+        # Percepções de todos os slots: brilho, fedor (booleanos) e número de
+        # buracos adjacentes (brisas), na mesma regra de get_observation; com
+        # compact_percepts, um código uint8 por slot
+        ax, ay = self.agent_pos[:, 0], self.agent_pos[:, 1]
+        slots = np.arange(self.num_envs)
+        glitter = np.abs(self.agent_pos - self.gold_pos).sum(axis=1) <= 1
+        stench = np.abs(self.agent_pos - self.wumpus_pos).sum(axis=1) <= STENCH_RADIUS
+        breeze = self.breeze_map[slots, ax, ay]
+        if self.compact_percepts:
+            return pack_percepts(glitter, stench, breeze)
+        return glitter, stench, breeze
+
+    def move_wumpus(self, slots):
+        # 50% de chance de ficar parado; senão sorteia um vizinho válido
+        moving = slots[self._draw(slots) >= 0.5]
+        if len(moving) == 0:
+            return
+
+        candidates = self.wumpus_pos[moving, None, :] + WUMPUS_MOVES[None, :, :]
+        cx, cy = candidates[..., 0], candidates[..., 1]
+        inside = (cx >= 0) & (cx < self.size) & (cy >= 0) & (cy < self.size)
+        pit = np.zeros_like(inside)
+        rows = np.broadcast_to(moving[:, None], cx.shape)
+        pit[inside] = self.pit_map[rows[inside], cx[inside], cy[inside]]
+        valid = inside & ~pit
+
+        n_valid = valid.sum(axis=1)
+        has_moves = n_valid > 0
+        moving, valid, candidates, n_valid = moving[has_moves], valid[has_moves], candidates[has_moves], n_valid[has_moves]
+        if len(moving) == 0:
+            return
+
+        # k-ésimo movimento válido (mesma regra de valid_moves[int(u * len)])
+        k = (self._draw(moving) * n_valid).astype(np.int64)
+        choice = np.argmax(np.cumsum(valid, axis=1) > k[:, None], axis=1)
+        self.wumpus_pos[moving] = candidates[np.arange(len(moving)), choice]
+
+    def step(self, actions):
+        # actions: array (N,) com códigos de ACTIONS; slots com NO_ACTION não
+        # andam. Retorna (obs, done, score); done marca os jogos que terminaram
+        # neste passo, score é o placar final deles e obs já é do jogo seguinte.
+        actions = np.asarray(actions)
+        slots = np.flatnonzero(self.active & (actions != NO_ACTION))
+        outcome = np.zeros(self.num_envs, dtype=np.int8)
+
+        self.score[slots] -= 1
+        self.step_count[slots] += 1
+
+        new_pos = self.agent_pos[slots] + ACTION_DELTAS[actions[slots]]
+        inside = ((new_pos >= 0) & (new_pos < self.size)).all(axis=1)
+        self.agent_pos[slots[inside]] = new_pos[inside]
+
+        ax, ay = self.agent_pos[slots, 0], self.agent_pos[slots, 1]
+        fell = self.pit_map[slots, ax, ay]
+        outcome[slots[fell]] = OUTCOME_PIT
+
+        # O Wumpus só se move nos jogos em que o agente não caiu
+        alive = slots[~fell]
+        self.move_wumpus(alive)
+
+        eaten = alive[(self.agent_pos[alive] == self.wumpus_pos[alive]).all(axis=1)]
+        self.score[eaten] -= 50
+        outcome[eaten] = OUTCOME_WUMPUS
+
+        alive = alive[outcome[alive] == OUTCOME_RUNNING]
+        won = alive[(self.agent_pos[alive] == self.gold_pos[alive]).all(axis=1)]
+        self.score[won] += 500
+        outcome[won] = OUTCOME_VICTORY
+
+        done = outcome != OUTCOME_RUNNING
+        final_score = self.score.copy()
+        self.end_games(done, outcome)
+        return self.get_observation(), done, final_score
+
+    def end_games(self, mask, outcome=OUTCOME_STUCK):
+        # Encerra os jogos marcados (por exemplo agente travado ou limite de
+        # passos), guarda o resultado e reinicia os slots com novos jogos
+        slots = np.flatnonzero(mask & self.active)
+        if len(slots) == 0:
+            return
+        outcome = np.broadcast_to(outcome, (self.num_envs,))
+        self._finished.append(np.stack([
+            self.game_index[slots],
+            outcome[slots],
+            self.score[slots],
+            self.step_count[slots],
+        ], axis=1))
+        self._start_games(slots)
+
+    def results(self):
+        # Resultados dos jogos já terminados, ordenados pelo índice do jogo:
+        # colunas (game_index, outcome, score, steps)
+        if not self._finished:
+            return np.zeros((0, 4), dtype=np.int64)
+        rows = np.concatenate(self._finished)
+        return rows[np.argsort(rows[:, 0], kind='stable')]
+
+    def new_results(self):
+        # Só os jogos terminados desde a chamada anterior (na ordem em que
+        # terminaram), para quem acompanha o experimento enquanto ele roda
+        rows = self._finished[self._reported:]
+        self._reported = len(self._finished)
+        if not rows:
+            return np.zeros((0, 4), dtype=np.int64)
+        return np.concatenate(rows)
+
+
+# --- SPRITES ---
+SPRITE_SIZE = 8
+FLOOR_VARIANTS = 32  # variações pré-geradas do ladrilho de grama
+
+# Paletas de Cores (R, G, B)
+PALETTES = {
+    'hero':   [[0,0,0], [0,0,0], [30,144,255], [255,215,0]],   # Azul e Dourado
+    'wumpus': [[0,0,0], [0,0,0], [220,20,60],  [255,255,255]], # Vermelho e Branco
+    'gold':   [[0,0,0], [0,0,0], [255,215,0],  [255,255,224]], # Dourado Brilhante
+    'pit':    [[0,0,0], [0,0,0], [20,20,20],   [50,50,50]],    # Cinza Escuro
+    # PALETA DE GRAMA:
+    'floor':  [[34, 139, 34], [0, 100, 0], [50, 205, 50], [107, 142, 35]] # Verde Floresta, Escuro, Lima
+}
+
+# Layouts dos Sprites (8x8)
+SPRITE_LAYOUTS = {
+    'hero': np.array([
+        [0,0,1,1,1,1,0,0],
+        [0,1,2,2,2,2,1,0],
+        [0,1,2,3,3,2,1,0],
+        [0,1,2,3,3,2,1,0],
+        [0,0,1,2,2,1,0,0],
+        [0,1,2,2,2,2,1,0],
+        [1,2,1,2,2,1,2,1],
+        [1,1,0,1,1,0,1,1]
+    ]),
+    'wumpus': np.array([
+        [0,1,0,0,0,0,1,0],
+        [1,2,1,0,0,1,2,1],
+        [1,2,1,1,1,1,2,1],
+        [1,2,2,2,2,2,2,1],
+        [1,2,3,2,2,3,2,1],
+        [1,2,2,2,2,2,2,1],
+        [0,1,2,1,1,2,1,0],
+        [0,1,1,0,0,1,1,0]
+    ]),
+    'gold': np.array([
+        [0,0,0,1,1,0,0,0],
+        [0,0,1,2,2,1,0,0],
+        [0,1,2,3,3,2,1,0],
+        [1,2,3,2,2,3,2,1],
+        [1,2,2,2,2,2,2,1],
+        [0,1,2,2,2,2,1,0],
+        [0,0,1,2,2,1,0,0],
+        [0,0,0,1,1,0,0,0]
+    ]),
+    'pit': np.array([
+        [0,0,1,1,1,1,0,0],
+        [0,1,2,2,2,2,1,0],
+        [1,2,2,2,2,2,2,1],
+        [1,2,2,3,3,2,2,1],
+        [1,2,2,3,3,2,2,1],
+        [1,2,2,2,2,2,2,1],
+        [0,1,2,2,2,2,1,0],
+        [0,0,1,1,1,1,0,0]
+    ])
+}
+
+
+@lru_cache(maxsize=None)
+def sprite_atlas():
+    # Atlas montado uma vez por processo. Cada sprite sai da paleta por
+    # indexação (paleta[layout]); o índice 0 é transparente (alpha 0).
+    # O chão é um conjunto fixo de FLOOR_VARIANTS ladrilhos de grama
+    # (K, 8, 8, 3) em uint8, sorteados uma única vez.
+    atlas = {}
+    for name, layout in SPRITE_LAYOUTS.items():
+        rgba = np.zeros((4, 4))
+        rgba[1:, :3] = np.array(PALETTES[name][1:]) / 255
+        rgba[1:, 3] = 1.0  # Opaco
+        atlas[name] = rgba[layout]
+
+    noise = np.random.default_rng(0).choice(3, (FLOOR_VARIANTS, SPRITE_SIZE, SPRITE_SIZE), p=[0.7, 0.2, 0.1])
+    atlas['floor'] = np.array(PALETTES['floor'], dtype=np.uint8)[noise]
+
+    # Compartilhado por todos: ninguém deve pintar por cima
+    for sprite in atlas.values():
+        sprite.flags.writeable = False
+    return atlas
+
+
 def get_sprite(name):
-    # Paletas de Cores (R, G, B)
-    palette = {
-        'hero':   [[0,0,0], [0,0,0], [30,144,255], [255,215,0]],   # Azul e Dourado
-        'wumpus': [[0,0,0], [0,0,0], [220,20,60],  [255,255,255]], # Vermelho e Branco
-        'gold':   [[0,0,0], [0,0,0], [255,215,0],  [255,255,224]], # Dourado Brilhante
-        'pit':    [[0,0,0], [0,0,0], [20,20,20],   [50,50,50]],    # Cinza Escuro
-        # PALETA DE GRAMA:
-        'floor':  [[34, 139, 34], [0, 100, 0], [50, 205, 50], [107, 142, 35]] # Verde Floresta, Escuro, Lima
-    }
-
-    # Layouts dos Sprites (8x8)
-    sprites_idx = {
-        'hero': np.array([
-            [0,0,1,1,1,1,0,0],
-            [0,1,2,2,2,2,1,0],
-            [0,1,2,3,3,2,1,0],
-            [0,1,2,3,3,2,1,0],
-            [0,0,1,2,2,1,0,0],
-            [0,1,2,2,2,2,1,0],
-            [1,2,1,2,2,1,2,1],
-            [1,1,0,1,1,0,1,1]
-        ]),
-        'wumpus': np.array([
-            [0,1,0,0,0,0,1,0],
-            [1,2,1,0,0,1,2,1],
-            [1,2,1,1,1,1,2,1],
-            [1,2,2,2,2,2,2,1],
-            [1,2,3,2,2,3,2,1],
-            [1,2,2,2,2,2,2,1],
-            [0,1,2,1,1,2,1,0],
-            [0,1,1,0,0,1,1,0]
-        ]),
-        'gold': np.array([
-            [0,0,0,1,1,0,0,0],
-            [0,0,1,2,2,1,0,0],
-            [0,1,2,3,3,2,1,0],
-            [1,2,3,2,2,3,2,1],
-            [1,2,2,2,2,2,2,1],
-            [0,1,2,2,2,2,1,0],
-            [0,0,1,2,2,1,0,0],
-            [0,0,0,1,1,0,0,0]
-        ]),
-        'pit': np.array([
-            [0,0,1,1,1,1,0,0],
-            [0,1,2,2,2,2,1,0],
-            [1,2,2,2,2,2,2,1],
-            [1,2,2,3,3,2,2,1],
-            [1,2,2,3,3,2,2,1],
-            [1,2,2,2,2,2,2,1],
-            [0,1,2,2,2,2,1,0],
-            [0,0,1,1,1,1,0,0]
-        ])
-    }
-
-    # Gera o sprite RGB
+    atlas = sprite_atlas()
     if name == 'floor':
-        # Chão é gerado com ruído para parecer grama
-        base = np.random.choice([0,1,2], (8,8), p=[0.7, 0.2, 0.1])
-        rgb = np.zeros((8,8,3), dtype=int)
-        for i in range(8):
-            for j in range(8):
-                rgb[i,j] = palette['floor'][base[i,j]]
-        return rgb
-
-    idx_map = sprites_idx.get(name)
-    colors_list = palette.get(name)
-
-    # Cria imagem RGBA (com canal alpha para transparência)
-    rgba = np.zeros((8,8,4), dtype=float)
-
-    for i in range(8):
-        for j in range(8):
-            idx = idx_map[i,j]
-            if idx > 0: # Se não for transparente
-                col = colors_list[idx]
-                rgba[i,j] = [col[0]/255, col[1]/255, col[2]/255, 1.0] # Opaco
-            else:
-                rgba[i,j] = [0,0,0,0] # Transparente
-    return rgba
+        # Chão: uma das variações de grama do atlas
+        return atlas['floor'][np.random.randint(FLOOR_VARIANTS)]
+    return atlas[name]
+
 
+def floor_tiles(size):
+    # Textura do chão de um tabuleiro: (size, size, 8, 8, 3), um ladrilho
+    # do atlas por célula
+    return sprite_atlas()['floor'][np.random.randint(FLOOR_VARIANTS, size=(size, size))]